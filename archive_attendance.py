@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+Cold-storage archive for attendance of closed academic years.
+
+Closed academic years are moved out of the hot `attendance` collection
+into one bucket document per student per academic year in
+`attendance_archive`:
+
+    {
+      "_id": "ADM123:2024",
+      "admission_no": "ADM123",
+      "academic_year": 2024,              # June 2024 .. May 2025
+      "months": {"2024-06": {<bitmap month, see attendance_bitmap.py>}, ...},
+      "records": <zlib-compressed BSON of the original daily documents>
+    }
+
+The bitmap months answer summary questions without decompression, and the
+compressed records keep full fidelity. iter_archived() yields archived
+records in the same shape as the hot collection, and with_archived() chains
+them after a hot cursor, so readers stay unaware of where the data lives. Once a
+year is archived, the hot collection and its indexes only hold open years.
+
+Usage:
+    python archive_attendance.py status
+    python archive_attendance.py archive [--academic-year 2024]
+    python archive_attendance.py compact          # archive every closed year, then compact
+
+Schedule `compact` nightly, e.g. with cron:
+    30 2 * * * cd /path/to/project && python archive_attendance.py compact
+"""
+
+import argparse
+import os
+import sys
+import time
+import zlib
+from datetime import date, datetime
+
+import bson
+from pymongo import ASCENDING, DeleteOne, MongoClient, ReplaceOne
+
+from attendance_bitmap import encode_month
+
+# Configuration
+MONGO_URL = os.getenv("MONGO_URL", "mongodb://localhost:27017/")
+MONGO_DB = os.getenv("MONGO_DB", "attendance_system")
+ARCHIVE_COLLECTION = "attendance_archive"
+META_COLLECTION = "attendance_archive_meta"
+ACADEMIC_YEAR_START_MONTH = int(os.getenv("ACADEMIC_YEAR_START_MONTH", "6"))
+STUDENTS_PER_BATCH = 500
+MAX_PASSES = 5
+RECORD_FIELDS = ("admission_no", "year", "month", "date", "attendance", "updatedBy",
+                 "lastUpdatedAt", "is_manual", "is_nfc", "nfc_uid")
+
+
+def academic_year_of(year, month):
+    """Academic year a calendar month belongs to (named after its first year)"""
+    return year if month >= ACADEMIC_YEAR_START_MONTH else year - 1
+
+
+def academic_year_months(academic_year):
+    """The twelve (year, month) pairs of an academic year"""
+    months = []
+    for i in range(12):
+        month = (ACADEMIC_YEAR_START_MONTH - 1 + i) % 12 + 1
+        months.append((academic_year if month >= ACADEMIC_YEAR_START_MONTH else academic_year + 1, month))
+    return months
+
+
+def academic_year_filter(academic_year):
+    """Hot-collection filter matching every record of an academic year"""
+    by_year = {}
+    for year, month in academic_year_months(academic_year):
+        by_year.setdefault(year, []).append(month)
+    return {"$or": [{"year": year, "month": {"$in": months}} for year, months in by_year.items()]}
+
+
+def closed_academic_years(db, today=None):
+    """Academic years present in the hot collection that have fully ended"""
+    today = today or date.today()
+    current = academic_year_of(today.year, today.month)
+    years = set()
+    for year in db["attendance"].distinct("year"):
+        years.update({year - 1, year})
+    return sorted(y for y in years
+                  if y < current and db["attendance"].find_one(academic_year_filter(y), {"_id": 1}))
+
+
+def archived_years(db):
+    """Academic years whose data is (at least partly) in the archive"""
+    return {meta["_id"] for meta in db[META_COLLECTION].find({}, {"_id": 1})}
+
+
+def pack_records(records):
+    """Compress daily records into a bytes blob"""
+    return zlib.compress(bson.encode({"r": records}), 6)
+
+
+def unpack_records(blob):
+    """Inverse of pack_records()"""
+    return bson.decode(zlib.decompress(blob))["r"]
+
+
+def build_bucket(admission_no, academic_year, records):
+    """Bucket document for one student-year"""
+    by_month = {}
+    for record in records:
+        by_month.setdefault((record["year"], record["month"]), []).append(record)
+    months = {}
+    for (year, month), month_records in sorted(by_month.items()):
+        packed = encode_month(admission_no, year, month, month_records)
+        months[f"{year}-{month:02d}"] = {key: packed[key] for key in ("morning", "evening", "manual")}
+    return {
+        "_id": f"{admission_no}:{academic_year}",
+        "admission_no": admission_no,
+        "academic_year": academic_year,
+        "months": months,
+        "record_count": len(records),
+        "records": bson.Binary(pack_records(records))
+    }
+
+
+def _merge(existing_blob, records):
+    """Union of previously archived and newly archived records; newer wins"""
+    merged = {(r["year"], r["month"], r["date"]): r for r in unpack_records(existing_blob)}
+    merged.update({(r["year"], r["month"], r["date"]): r for r in records})
+    return [merged[key] for key in sorted(merged)]
+
+
+def archive_year(db, academic_year, students_per_batch=STUDENTS_PER_BATCH, max_passes=MAX_PASSES):
+    """
+    Move one academic year from the hot collection into bucket documents.
+
+    Works a batch of students at a time: buckets are upserted (merged with
+    any bucket from an earlier, interrupted run) and only then are the
+    batch's hot records deleted, so a crash never loses data and the job
+    can simply be re-run. Only the documents that were read and packed are
+    deleted, and only if they are unchanged, so a record written or
+    corrected meanwhile stays in the hot collection; further passes pick
+    those up. Returns (students, records) archived.
+    """
+    db[META_COLLECTION].update_one(
+        {"_id": academic_year},
+        {"$set": {"state": "archiving", "started_at": datetime.utcnow()}},
+        upsert=True
+    )
+    hot = db["attendance"]
+    year_filter = academic_year_filter(academic_year)
+
+    students, records_moved = set(), 0
+    for _ in range(max_passes):
+        admission_nos = sorted(hot.distinct("admission_no", year_filter))
+        if not admission_nos:
+            break
+        for start in range(0, len(admission_nos), students_per_batch):
+            batch = admission_nos[start:start + students_per_batch]
+            archived, moved = _archive_batch(db, academic_year, {"admission_no": {"$in": batch}, **year_filter})
+            students.update(archived)
+            records_moved += moved
+
+    remaining = hot.count_documents(year_filter)
+    db[META_COLLECTION].update_one(
+        {"_id": academic_year},
+        {"$set": {"state": "archived" if not remaining else "archiving", "archived_at": datetime.utcnow()},
+         "$inc": {"records": records_moved}}
+    )
+    return len(students), records_moved
+
+
+def _archive_batch(db, academic_year, batch_filter):
+    """Pack one batch of hot records into buckets, then delete exactly those records"""
+    hot, archive = db["attendance"], db[ARCHIVE_COLLECTION]
+    grouped, packed = {}, []
+    for record in hot.find(batch_filter, {f: 1 for f in RECORD_FIELDS}):
+        # Match on the values read, so a record updated since is not deleted unarchived
+        packed.append(DeleteOne({"_id": record.pop("_id"),
+                                 "lastUpdatedAt": record.get("lastUpdatedAt"),
+                                 "attendance": record.get("attendance")}))
+        grouped.setdefault(record["admission_no"], []).append(record)
+    existing = {
+        doc["admission_no"]: doc["records"]
+        for doc in archive.find({"_id": {"$in": [f"{a}:{academic_year}" for a in grouped]}},
+                                {"admission_no": 1, "records": 1})
+    }
+
+    operations = []
+    for admission_no, records in grouped.items():
+        if admission_no in existing:
+            records = _merge(existing[admission_no], records)
+        else:
+            records.sort(key=lambda r: (r["year"], r["month"], r["date"]))
+        bucket = build_bucket(admission_no, academic_year, records)
+        operations.append(ReplaceOne({"_id": bucket["_id"]}, bucket, upsert=True))
+    if not operations:
+        return set(), 0
+    archive.bulk_write(operations, ordered=False)
+    return set(grouped), hot.bulk_write(packed, ordered=False).deleted_count
+
+
+def iter_archived(db, admission_nos=None, year=None, month=None, year_months=None, skip_keys=()):
+    """
+    Yield archived daily records matching the filters, one bucket at a time.
+
+    `year`/`month` or an explicit list of (year, month) pairs select the
+    months; only academic years that have been archived are queried, so
+    reads of open years cost nothing extra. Records whose
+    (admission_no, year, month, date) is in `skip_keys` are left out.
+    """
+    wanted = set(year_months) if year_months is not None else None
+    candidate_years = archived_years(db)
+    if not candidate_years:
+        return
+    if wanted is not None:
+        candidate_years &= {academic_year_of(y, m) for y, m in wanted}
+    elif year is not None:
+        months = [month] if month is not None else range(1, 13)
+        candidate_years &= {academic_year_of(year, m) for m in months}
+    if not candidate_years:
+        return
+
+    if admission_nos is not None:
+        # Bucket ids are known, so read them straight off the _id index
+        query = {"_id": {"$in": [f"{admission_no}:{academic_year}"
+                                 for admission_no in admission_nos for academic_year in sorted(candidate_years)]}}
+        order = [("_id", ASCENDING)]
+    else:
+        # Served by the academic_year_admission_no index (see audit_query_plans.INDEXES)
+        query = {"academic_year": {"$in": sorted(candidate_years)}}
+        order = [("academic_year", ASCENDING), ("admission_no", ASCENDING)]
+    for bucket in db[ARCHIVE_COLLECTION].find(query, {"records": 1}).sort(order):
+        for record in unpack_records(bucket["records"]):
+            if wanted is not None and (record["year"], record["month"]) not in wanted:
+                continue
+            if year is not None and record["year"] != year:
+                continue
+            if month is not None and record["month"] != month:
+                continue
+            if (record["admission_no"], record["year"], record["month"], record["date"]) in skip_keys:
+                continue
+            yield record
+
+
+def with_archived(db, hot, admission_nos=None, year=None, month=None, year_months=None):
+    """
+    Records from a hot-collection cursor followed by the archived ones for
+    the same filters. A day present in both tiers (corrected after
+    archiving, not yet re-archived) is taken from the hot collection, so
+    `hot` must project admission_no, year, month and date.
+    """
+    archived = archived_years(db)
+    hot_keys = set()
+    for record in hot:
+        # Only days of archived years can also be in the archive
+        if archived and academic_year_of(record["year"], record["month"]) in archived:
+            hot_keys.add((record["admission_no"], record["year"], record["month"], record["date"]))
+        yield record
+    yield from iter_archived(db, admission_nos, year, month, year_months, skip_keys=hot_keys)
+
+
+def find_month(db, admission_no, year, month):
+    """
+    One student-month from wherever it lives, in the hot collection's shape.
+    A day present in both tiers (corrected after archiving, not yet
+    re-archived) is taken from the hot collection.
+    """
+    hot = db["attendance"].find({"admission_no": admission_no, "year": year, "month": month}, {"_id": 0})
+    return list(with_archived(db, hot, [admission_no], year, month))
+
+
+def print_status(db):
+    """Hot vs archive sizes and archived academic years"""
+    for name in ("attendance", ARCHIVE_COLLECTION):
+        stats = db.command("collStats", name)
+        print(f"   {name:<20} {stats.get('count', 0):>12,} docs  "
+              f"{stats.get('storageSize', 0) / 1e6:>10.1f} MB data  "
+              f"{stats.get('totalIndexSize', 0) / 1e6:>10.1f} MB indexes")
+    for meta in db[META_COLLECTION].find().sort("_id", ASCENDING):
+        print(f"   {meta['_id']}-{str(meta['_id'] + 1)[-2:]}: {meta.get('state')} "
+              f"({meta.get('records', 0):,} records)")
+
+
+def main():
+    """Archive, compact and status commands"""
+    parser = argparse.ArgumentParser(description="Archive closed academic years of attendance")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    archive_parser = subparsers.add_parser("archive", help="archive closed academic years")
+    archive_parser.add_argument("--academic-year", type=int,
+                                help="only this academic year (named after its first calendar year)")
+    subparsers.add_parser("compact", help="archive every closed year, then compact the hot collection")
+    subparsers.add_parser("status", help="show hot and archive sizes")
+    args = parser.parse_args()
+
+    client = MongoClient(MONGO_URL)
+    db = client[MONGO_DB]
+    try:
+        if args.command in ("archive", "compact"):
+            current = academic_year_of(date.today().year, date.today().month)
+            years = [args.academic_year] if getattr(args, "academic_year", None) else closed_academic_years(db)
+            for academic_year in years:
+                if academic_year >= current:
+                    print(f"❌ Academic year {academic_year} is still open")
+                    return 1
+                start = time.perf_counter()
+                students, records = archive_year(db, academic_year)
+                print(f"✅ {academic_year}: {records:,} records from {students:,} students archived "
+                      f"in {time.perf_counter() - start:.1f}s")
+            if not years:
+                print("✅ Nothing to archive")
+        if args.command == "compact":
+            db.command("compact", "attendance")
+            print("✅ Hot collection compacted")
+        print_status(db)
+    finally:
+        client.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
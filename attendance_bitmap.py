@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+"""
+Compact bitmap storage for one student-month of attendance.
+
+Instead of one document per student per day, a student-month is packed
+into a single document in the `attendance_months` collection:
+
+    {
+      "_id": "ADM123:2025-09",
+      "admission_no": "ADM123", "year": 2025, "month": 9,
+      "morning": {"present": <int>, "absent": <int>, "late": <int>, "excused": <int>},
+      "evening": {...},
+      "manual": <int>,
+      "edits": [[day, session index, status index, updatedBy, lastUpdatedAt], ...]
+    }
+
+Each status field is a 31-bit mask where bit (day - 1) is set when that
+session had that status, so a day with no bit set in any mask was not
+recorded ("NA"). `manual` marks days recorded by hand and `edits` keeps the
+last EDIT_LOG_SIZE changes. A month view is a single document read, and
+attendance counts are popcounts.
+
+Usage:
+    python attendance_bitmap.py migrate [--year 2025] [--month 9]
+    python attendance_bitmap.py stats
+    python attendance_bitmap.py check     # apply_mark -> read_month round trip
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+from pymongo import ASCENDING, MongoClient, ReplaceOne
+
+# Configuration
+MONGO_URL = os.getenv("MONGO_URL", "mongodb://localhost:27017/")
+MONGO_DB = os.getenv("MONGO_DB", "attendance_system")
+MONTHS_COLLECTION = "attendance_months"
+SESSIONS = ("morning", "evening")
+STATUSES = ("Present", "Absent", "Late", "Excused")
+MASKS = tuple(status.lower() for status in STATUSES)
+EDIT_LOG_SIZE = 64
+BATCH_SIZE = 1000
+
+
+def month_id(admission_no, year, month):
+    """Document id of a student-month"""
+    return f"{admission_no}:{year}-{month:02d}"
+
+
+def empty_month(admission_no, year, month):
+    """A student-month with nothing recorded"""
+    return {
+        "_id": month_id(admission_no, year, month),
+        "admission_no": admission_no,
+        "year": year,
+        "month": month,
+        **{session: {mask: 0 for mask in MASKS} for session in SESSIONS},
+        "manual": 0,
+        "edits": []
+    }
+
+
+def encode_month(admission_no, year, month, records):
+    """
+    Pack daily attendance documents (the `attendance` collection shape)
+    for one student-month into a bitmap document. Records are applied
+    oldest first and, as in apply_mark(), each one clears the day's bit in
+    the session's other masks, so the latest of several records for a day
+    wins.
+    """
+    doc = empty_month(admission_no, year, month)
+    for record in sorted(records, key=lambda r: (r.get("lastUpdatedAt") or datetime.min)):
+        bit = 1 << (record["date"] - 1)
+        for session in SESSIONS:
+            status = record["attendance"].get(session)
+            if status in STATUSES:
+                for mask in MASKS:
+                    if mask == status.lower():
+                        doc[session][mask] |= bit
+                    else:
+                        doc[session][mask] &= ~bit
+        if record.get("is_manual"):
+            doc["manual"] |= bit
+            doc["edits"].extend(
+                [record["date"], SESSIONS.index(session), STATUSES.index(status),
+                 record.get("updatedBy"), record.get("lastUpdatedAt")]
+                for session, status in record["attendance"].items()
+                if session in SESSIONS and status in STATUSES
+            )
+    doc["edits"] = doc["edits"][-EDIT_LOG_SIZE:]
+    return doc
+
+
+def day_status(doc, session, day):
+    """Status string of one session on one day, or "NA" if not recorded"""
+    bit = 1 << (day - 1)
+    for status, mask in zip(STATUSES, MASKS):
+        if doc[session][mask] & bit:
+            return status
+    return "NA"
+
+
+def decode_month(doc):
+    """Unpack a bitmap document into daily records, as the JSON views expect"""
+    recorded = 0
+    for session in SESSIONS:
+        for mask in MASKS:
+            recorded |= doc[session][mask]
+
+    records = []
+    day = 1
+    while recorded >> (day - 1):
+        if recorded >> (day - 1) & 1:
+            records.append({
+                "admission_no": doc["admission_no"],
+                "year": doc["year"],
+                "month": doc["month"],
+                "date": day,
+                "attendance": {session: day_status(doc, session, day) for session in SESSIONS},
+                "is_manual": bool(doc["manual"] >> (day - 1) & 1)
+            })
+        day += 1
+    return records
+
+
+def popcount(value):
+    """Number of set bits (int.bit_count needs Python 3.10)"""
+    return bin(value).count("1")
+
+
+def month_summary(doc):
+    """Per-session status counts and the attendance percentage for the month"""
+    counts = {
+        session: {mask: popcount(doc[session][mask]) for mask in MASKS}
+        for session in SESSIONS
+    }
+    attended = sum(c["present"] + c["late"] for c in counts.values())
+    recorded = sum(sum(c.values()) for c in counts.values())
+    return {
+        "sessions": counts,
+        "manual_days": popcount(doc["manual"]),
+        "percentage": round(100 * attended / recorded, 2) if recorded else 0.0
+    }
+
+
+def apply_mark(collection, admission_no, year, month, day, session, status,
+               updated_by, is_manual=False):
+    """
+    Record one session in a single upsert.
+
+    The day's bit is set in the mask for `status` and cleared in the other
+    three masks of that session, and the change is appended to the edit log.
+    A new student-month gets the rest of the empty_month() skeleton on
+    insert, so every mask exists for readers.
+    """
+    if session not in SESSIONS or status not in STATUSES:
+        raise ValueError(f"Invalid session/status: {session}/{status}")
+
+    bit = 1 << (day - 1)
+    bit_ops = {
+        f"{session}.{mask}": {"or": bit} if mask == status.lower() else {"and": ~bit}
+        for mask in MASKS
+    }
+    if is_manual:
+        bit_ops["manual"] = {"or": bit}
+
+    # Everything $bit and $push do not write already, or the two would conflict
+    skeleton = empty_month(admission_no, year, month)
+    on_insert = {
+        field: value for field, value in skeleton.items()
+        if field not in ("_id", "edits", session) and field not in bit_ops
+    }
+
+    collection.update_one(
+        {"_id": month_id(admission_no, year, month)},
+        {
+            "$setOnInsert": on_insert,
+            "$bit": bit_ops,
+            "$push": {"edits": {
+                "$each": [[day, SESSIONS.index(session), STATUSES.index(status),
+                           updated_by, datetime.utcnow()]],
+                "$slice": -EDIT_LOG_SIZE
+            }}
+        },
+        upsert=True
+    )
+
+
+def read_month(collection, admission_no, year, month):
+    """One point read; returns (daily records, summary)"""
+    doc = collection.find_one({"_id": month_id(admission_no, year, month)})
+    if doc is None:
+        doc = empty_month(admission_no, year, month)
+    return decode_month(doc), month_summary(doc)
+
+
+def migrate(db, year=None, month=None, batch_size=BATCH_SIZE):
+    """
+    Pack the per-day `attendance` collection into `attendance_months`.
+
+    Reads the source in (admission_no, year, month, date) order so each
+    student-month is contiguous, and replaces target documents in batches,
+    which makes the migration safe to re-run. Returns the number written.
+    """
+    query = {}
+    if year is not None:
+        query["year"] = year
+    if month is not None:
+        query["month"] = month
+
+    cursor = db["attendance"].find(
+        query,
+        {"_id": 0, "admission_no": 1, "year": 1, "month": 1, "date": 1,
+         "attendance": 1, "is_manual": 1, "updatedBy": 1, "lastUpdatedAt": 1}
+    ).sort([("admission_no", ASCENDING), ("year", ASCENDING),
+            ("month", ASCENDING), ("date", ASCENDING)]).batch_size(batch_size * 30).allow_disk_use(True)
+
+    target = db[MONTHS_COLLECTION]
+    written = 0
+    operations = []
+    current_key, current_records = None, []
+
+    def flush_month():
+        if current_records:
+            operations.append(ReplaceOne(
+                {"_id": month_id(*current_key)}, encode_month(*current_key, current_records), upsert=True))
+
+    for record in cursor:
+        key = (record["admission_no"], record["year"], record["month"])
+        if key != current_key:
+            flush_month()
+            current_key, current_records = key, []
+            if len(operations) >= batch_size:
+                target.bulk_write(operations, ordered=False)
+                written += len(operations)
+                operations = []
+        current_records.append(record)
+    flush_month()
+
+    if operations:
+        target.bulk_write(operations, ordered=False)
+        written += len(operations)
+    return written
+
+
+def storage_stats(db):
+    """Document counts and on-disk sizes of the source and packed collections"""
+    stats = {}
+    for name in ("attendance", MONTHS_COLLECTION):
+        coll_stats = db.command("collStats", name)
+        stats[name] = {
+            "documents": coll_stats.get("count", 0),
+            "size_bytes": coll_stats.get("size", 0),
+            "storage_bytes": coll_stats.get("storageSize", 0),
+            "index_bytes": coll_stats.get("totalIndexSize", 0)
+        }
+    return stats
+
+
+def check_encode_month():
+    """
+    Encode two records for the same day and check that only the later one
+    shows; returns a list of mismatches (empty when all is well).
+    """
+    records = [
+        {"date": 5, "attendance": {"morning": "Absent", "evening": "Absent"},
+         "lastUpdatedAt": datetime(2025, 9, 5, 9)},
+        {"date": 5, "attendance": {"morning": "Present", "evening": "NA"},
+         "lastUpdatedAt": datetime(2025, 9, 5, 10)},
+    ]
+    doc = encode_month("CHECK-1", 2025, 9, reversed(records))
+    problems = []
+    for session, want in (("morning", "Present"), ("evening", "Absent")):
+        got = day_status(doc, session, 5)
+        if got != want:
+            problems.append(f"encode_month: {session} of a re-marked day is {got}, expected {want}")
+        marked = sum(doc[session][mask] >> 4 & 1 for mask in MASKS)
+        if marked != 1:
+            problems.append(f"encode_month: {session} of a re-marked day is in {marked} masks")
+    return problems
+
+
+def check_round_trip(db, collection_name=MONTHS_COLLECTION + "_check"):
+    """
+    Write marks into fresh student-months with apply_mark() and read them
+    back with read_month(). Uses a scratch collection that is dropped
+    afterwards; returns a list of mismatches (empty when all is well).
+    """
+    collection = db[collection_name]
+    collection.drop()
+    marks = [
+        ("CHECK-1", 3, "morning", "Present", False),
+        ("CHECK-1", 3, "morning", "Late", False),      # overwrites the day's morning
+        ("CHECK-1", 4, "evening", "Absent", True),
+        ("CHECK-2", 1, "evening", "Excused", False),   # first write of a month is an evening
+    ]
+    expected = {}
+    try:
+        for admission_no, day, session, status, is_manual in marks:
+            apply_mark(collection, admission_no, 2025, 9, day, session, status, "check", is_manual)
+            record = expected.setdefault((admission_no, day), {s: "NA" for s in SESSIONS})
+            record[session] = status
+
+        problems = []
+        for admission_no in ("CHECK-1", "CHECK-2"):
+            records, summary = read_month(collection, admission_no, 2025, 9)
+            got = {(admission_no, r["date"]): r["attendance"] for r in records}
+            want = {key: value for key, value in expected.items() if key[0] == admission_no}
+            if got != want:
+                problems.append(f"{admission_no}: read {got}, expected {want}")
+        _, summary = read_month(collection, "CHECK-1", 2025, 9)
+        if summary["manual_days"] != 1:
+            problems.append(f"CHECK-1: {summary['manual_days']} manual days, expected 1")
+        return problems
+    finally:
+        collection.drop()
+
+
+def print_stats(db):
+    """Print a storage comparison between the two layouts"""
+    stats = storage_stats(db)
+    for name, values in stats.items():
+        print(f"   {name:<18} {values['documents']:>12,} docs  "
+              f"{values['storage_bytes'] / 1e6:>10.1f} MB data  "
+              f"{values['index_bytes'] / 1e6:>10.1f} MB indexes")
+    source = stats["attendance"]["storage_bytes"] + stats["attendance"]["index_bytes"]
+    packed = stats[MONTHS_COLLECTION]["storage_bytes"] + stats[MONTHS_COLLECTION]["index_bytes"]
+    if packed:
+        print(f"   packed layout is {source / packed:.1f}x smaller")
+
+
+def main():
+    """Migration and storage-stats command line"""
+    parser = argparse.ArgumentParser(description="Bitmap-packed student-month attendance storage")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    migrate_parser = subparsers.add_parser("migrate", help="pack attendance into attendance_months")
+    migrate_parser.add_argument("--year", type=int, help="only migrate this year")
+    migrate_parser.add_argument("--month", type=int, help="only migrate this month")
+    migrate_parser.add_argument("--batch-size", type=int, default=BATCH_SIZE,
+                                help="student-months per bulk write")
+    subparsers.add_parser("stats", help="compare storage of the two layouts")
+    subparsers.add_parser("check", help="check encode_month, and round-trip apply_mark and read_month "
+                                        "in a scratch collection")
+    args = parser.parse_args()
+
+    client = MongoClient(MONGO_URL)
+    db = client[MONGO_DB]
+    try:
+        if args.command == "check":
+            problems = check_encode_month() + check_round_trip(db)
+            for problem in problems:
+                print(f"❌ {problem}")
+            if problems:
+                return 1
+            print("✅ encode_month and apply_mark / read_month round trip OK")
+            return 0
+        if args.command == "migrate":
+            print("📦 Packing attendance into student-month bitmaps")
+            start = time.perf_counter()
+            written = migrate(db, args.year, args.month, args.batch_size)
+            print(f"✅ {written:,} student-month documents written "
+                  f"in {time.perf_counter() - start:.1f}s")
+        print_stats(db)
+    finally:
+        client.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+Vectorized attendance reports for a class or a department.
+
+A term's attendance is pulled with one projected cursor and packed into
+columnar NumPy arrays (student index, day number, morning and evening
+status codes). Every metric is then computed with array operations
+instead of per-student Python loops:
+
+  - attendance percentage per student, overall and per session
+  - longest run of consecutive full-day absences per student
+  - chronic-absence flags (attendance below a threshold)
+  - absence rate by day of week
+  - monthly trend for the whole group
+
+Usage:
+    python attendance_report.py --class 10-A --start 2025-06-01 --end 2025-09-30
+    python attendance_report.py --department 10 --json report.json
+    python attendance_report.py --benchmark 5000000
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from array import array
+from datetime import date
+from itertools import cycle, islice
+
+import numpy as np
+from pymongo import MongoClient
+
+from archive_attendance import with_archived
+
+# Configuration
+MONGO_URL = os.getenv("MONGO_URL", "mongodb://localhost:27017/")
+MONGO_DB = os.getenv("MONGO_DB", "attendance_system")
+CHRONIC_THRESHOLD = 90.0
+BATCH_SIZE = 50000
+
+# Status codes used in the columnar arrays
+NA, PRESENT, ABSENT, LATE, EXCUSED = range(5)
+STATUS_CODES = {"Present": PRESENT, "Absent": ABSENT, "Late": LATE, "Excused": EXCUSED}
+WEEKDAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+
+class Columns:
+    """Columnar attendance for a group of students"""
+
+    def __init__(self, students, student_idx, day, morning, evening):
+        self.students = students          # list of student dicts, indexed by student_idx
+        self.student_idx = student_idx    # int32, one entry per attendance record
+        self.day = day                    # int32, days since 1970-01-01
+        self.morning = morning            # int8 status code
+        self.evening = evening            # int8 status code
+
+    def __len__(self):
+        return len(self.day)
+
+
+def to_day_numbers(year, month, day_of_month):
+    """Vectorized (year, month, day) -> days since the Unix epoch"""
+    months = (year.astype(np.int64) - 1970) * 12 + (month.astype(np.int64) - 1)
+    first_of_month = months.astype("datetime64[M]").astype("datetime64[D]").astype(np.int64)
+    return (first_of_month + day_of_month - 1).astype(np.int32)
+
+
+def term_months(start, end):
+    """Every (year, month) between two dates, inclusive"""
+    months = []
+    year, month = start.year, start.month
+    while (year, month) <= (end.year, end.month):
+        months.append((year, month))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+def load_columns(db, class_filter, start, end):
+    """
+    Read one class or department for a date range into Columns.
+
+    Student documents are read once to assign indexes; attendance comes from
+    a single cursor projected to the fields the report needs (followed by
+    any archived academic years) and is appended into typed arrays, so
+    memory stays a few bytes per record.
+    """
+    students = list(db["students"].find(
+        class_filter, {"_id": 0, "admission_no": 1, "name": 1, "class_name": 1}
+    ).sort("admission_no", 1))
+    index_of = {student["admission_no"]: i for i, student in enumerate(students)}
+
+    year_months = term_months(start, end)
+    months_by_year = {}
+    for year, month in year_months:
+        months_by_year.setdefault(year, []).append(month)
+    query = {
+        "admission_no": {"$in": list(index_of)},
+        "$or": [{"year": year, "month": {"$in": months}} for year, months in months_by_year.items()]
+    }
+    projection = {"_id": 0, "admission_no": 1, "year": 1, "month": 1, "date": 1,
+                  "attendance.morning": 1, "attendance.evening": 1}
+
+    hot = db["attendance"].find(query, projection).batch_size(BATCH_SIZE)
+    records = with_archived(db, hot, list(index_of), year_months=year_months)
+    return pack_columns(students, records, start, end)
+
+
+def pack_columns(students, records, start, end):
+    """Append attendance documents into typed arrays and return Columns in [start, end]"""
+    index_of = {student["admission_no"]: i for i, student in enumerate(students)}
+    student_idx, years, months, days = array("i"), array("h"), array("b"), array("b")
+    morning, evening = array("b"), array("b")
+    for record in records:
+        student_idx.append(index_of[record["admission_no"]])
+        years.append(record["year"])
+        months.append(record["month"])
+        days.append(record["date"])
+        sessions = record.get("attendance", {})
+        morning.append(STATUS_CODES.get(sessions.get("morning"), NA))
+        evening.append(STATUS_CODES.get(sessions.get("evening"), NA))
+
+    day = to_day_numbers(np.frombuffer(years, np.int16), np.frombuffer(months, np.int8),
+                         np.frombuffer(days, np.int8))
+    in_range = (day >= _epoch_day(start)) & (day <= _epoch_day(end))
+    return Columns(
+        students,
+        np.frombuffer(student_idx, np.int32)[in_range],
+        day[in_range],
+        np.frombuffer(morning, np.int8)[in_range],
+        np.frombuffer(evening, np.int8)[in_range],
+    )
+
+
+def _epoch_day(value):
+    return (value - date(1970, 1, 1)).days
+
+
+def _percent(numerator, denominator):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(denominator > 0, 100.0 * numerator / denominator, 0.0)
+
+
+def longest_absence_streaks(columns, full_day_absent):
+    """Longest run of consecutive recorded days with both sessions absent, per student"""
+    order = np.lexsort((columns.day, columns.student_idx))
+    student = columns.student_idx[order]
+    absent = full_day_absent[order]
+
+    # A run starts at an absent day whose predecessor is present or another student
+    previous_absent = np.concatenate(([False], absent[:-1]))
+    same_student = np.concatenate(([False], student[1:] == student[:-1]))
+    run_start = absent & ~(previous_absent & same_student)
+    run_id = np.cumsum(run_start) - 1
+
+    streaks = np.zeros(len(columns.students), dtype=np.int32)
+    if absent.any():
+        run_lengths = np.bincount(run_id[absent])
+        run_owner = student[run_start]
+        np.maximum.at(streaks, run_owner, run_lengths)
+    return streaks
+
+
+def compute_report(columns, chronic_threshold=CHRONIC_THRESHOLD):
+    """Every report metric from Columns, as plain JSON-serializable data"""
+    n_students = len(columns.students)
+    idx = columns.student_idx
+
+    morning_recorded = columns.morning != NA
+    evening_recorded = columns.evening != NA
+    morning_attended = (columns.morning == PRESENT) | (columns.morning == LATE)
+    evening_attended = (columns.evening == PRESENT) | (columns.evening == LATE)
+
+    def per_student(mask):
+        return np.bincount(idx, weights=mask, minlength=n_students)
+
+    sessions_recorded = per_student(morning_recorded) + per_student(evening_recorded)
+    sessions_attended = per_student(morning_attended) + per_student(evening_attended)
+    percentage = _percent(sessions_attended, sessions_recorded)
+    morning_pct = _percent(per_student(morning_attended), per_student(morning_recorded))
+    evening_pct = _percent(per_student(evening_attended), per_student(evening_recorded))
+
+    full_day_absent = (columns.morning == ABSENT) & (columns.evening == ABSENT)
+    streaks = longest_absence_streaks(columns, full_day_absent)
+    chronic = (sessions_recorded > 0) & (percentage < chronic_threshold)
+
+    # Day-of-week absence rate; 1970-01-01 was a Thursday (weekday 3)
+    weekday = (columns.day.astype(np.int64) + 3) % 7
+    absent_sessions = (columns.morning == ABSENT).astype(np.int64) + (columns.evening == ABSENT)
+    recorded_sessions = morning_recorded.astype(np.int64) + evening_recorded
+    weekday_rate = _percent(np.bincount(weekday, weights=absent_sessions, minlength=7),
+                            np.bincount(weekday, weights=recorded_sessions, minlength=7))
+
+    # Monthly trend over the whole group
+    month_number = columns.day.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+    trend = []
+    if len(columns):
+        first = month_number.min()
+        offset = month_number - first
+        attended = np.bincount(offset, weights=morning_attended.astype(np.int64) + evening_attended)
+        recorded = np.bincount(offset, weights=recorded_sessions)
+        for i, pct in enumerate(_percent(attended, recorded)):
+            if recorded[i]:
+                label = str(np.datetime64(int(first + i), "M"))
+                trend.append({"month": label, "percentage": round(float(pct), 2)})
+
+    total_recorded = sessions_recorded.sum()
+    return {
+        "students": [
+            {
+                **student,
+                "percentage": round(float(percentage[i]), 2),
+                "morning_percentage": round(float(morning_pct[i]), 2),
+                "evening_percentage": round(float(evening_pct[i]), 2),
+                "sessions_recorded": int(sessions_recorded[i]),
+                "longest_absence_streak": int(streaks[i]),
+                "chronic_absence": bool(chronic[i])
+            }
+            for i, student in enumerate(columns.students)
+        ],
+        "summary": {
+            "students": n_students,
+            "records": len(columns),
+            "percentage": round(float(100.0 * sessions_attended.sum() / total_recorded), 2)
+            if total_recorded else 0.0,
+            "chronic_absentees": int(chronic.sum()),
+            "chronic_threshold": chronic_threshold,
+            "absence_rate_by_weekday": {
+                WEEKDAYS[d]: round(float(weekday_rate[d]), 2) for d in range(7)
+                if recorded_sessions[weekday == d].sum()
+            },
+            "monthly_trend": trend
+        }
+    }
+
+
+def synthetic_records(n_students=5000, pool_size=100000, seed=7):
+    """A pool of projected attendance documents, shaped like load_columns' cursor"""
+    rng = np.random.default_rng(seed)
+    first_day = date(2025, 6, 1).toordinal()
+    students = rng.integers(0, n_students, pool_size)
+    offsets = rng.integers(0, 300, pool_size)
+    names = ["Present", "Absent", "Late", "Excused"]
+    sessions = rng.choice(4, (pool_size, 2), p=[0.9, 0.07, 0.02, 0.01])
+    records = []
+    for student, offset, (am, pm) in zip(students.tolist(), offsets.tolist(), sessions.tolist()):
+        day = date.fromordinal(first_day + offset)
+        records.append({"admission_no": f"ADM{student:07d}", "year": day.year, "month": day.month,
+                        "date": day.day, "attendance": {"morning": names[am], "evening": names[pm]}})
+    return records
+
+
+def run_benchmark(n_records, n_students=5000):
+    """
+    Time the two stages of a report on synthetic data: packing documents
+    into Columns (the Python loop in load_columns) and compute_report over
+    those same Columns.
+    MongoDB transfer time is not included; a real --class/--department
+    run against a generated database prints load and compute times.
+    """
+    students = [{"admission_no": f"ADM{i:07d}"} for i in range(n_students)]
+    pool = synthetic_records(n_students)
+    records = islice(cycle(pool), n_records)
+    start = time.perf_counter()
+    packed = pack_columns(students, records, date(2025, 6, 1), date(2026, 3, 31))
+    pack_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    report = compute_report(packed)
+    compute_elapsed = time.perf_counter() - start
+
+    print(f"✅ {len(packed):,} records, {n_students:,} students (MongoDB fetch not included)")
+    print(f"   packing documents:  {pack_elapsed * 1000:>8.0f} ms "
+          f"({len(packed) / pack_elapsed / 1e6:.1f}M records/s)")
+    print(f"   computing report:   {compute_elapsed * 1000:>8.0f} ms "
+          f"({len(packed) / compute_elapsed / 1e6:.1f}M records/s)")
+    print(f"   total:              {(pack_elapsed + compute_elapsed) * 1000:>8.0f} ms")
+    print(f"   overall {report['summary']['percentage']}%, "
+          f"{report['summary']['chronic_absentees']} chronic absentees")
+
+
+def print_report(report, title):
+    """Human-readable report"""
+    summary = report["summary"]
+    print(f"\n📊 {title}: {summary['students']} students, {summary['records']:,} records")
+    print(f"   Overall attendance: {summary['percentage']}%")
+    print(f"   Chronic absentees (< {summary['chronic_threshold']}%): {summary['chronic_absentees']}")
+    print("   Absence rate by weekday: " + ", ".join(
+        f"{day} {rate}%" for day, rate in summary["absence_rate_by_weekday"].items()))
+    print("   Monthly trend: " + ", ".join(
+        f"{point['month']} {point['percentage']}%" for point in summary["monthly_trend"]))
+    print(f"\n   {'admission_no':<14} {'name':<22} {'%':>7} {'AM %':>7} {'PM %':>7} {'streak':>7}")
+    for student in sorted(report["students"], key=lambda s: s["percentage"]):
+        flag = " ⚠" if student["chronic_absence"] else ""
+        print(f"   {student['admission_no']:<14} {student.get('name', ''):<22} "
+              f"{student['percentage']:>7.2f} {student['morning_percentage']:>7.2f} "
+              f"{student['evening_percentage']:>7.2f} {student['longest_absence_streak']:>7}{flag}")
+
+
+def main():
+    """Build a class or department report, or run the benchmark"""
+    parser = argparse.ArgumentParser(description="Vectorized attendance reports")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--class", dest="class_name", help="class name, e.g. 10-A")
+    group.add_argument("--department", help="grade prefix covering every section, e.g. 10")
+    group.add_argument("--benchmark", type=int, metavar="RECORDS",
+                       help="time packing and computing a report of this many synthetic records")
+    today = date.today()
+    parser.add_argument("--start", type=date.fromisoformat, default=date(today.year, today.month, 1),
+                        help="first day, YYYY-MM-DD (default: start of this month)")
+    parser.add_argument("--end", type=date.fromisoformat, default=today, help="last day, YYYY-MM-DD")
+    parser.add_argument("--chronic-threshold", type=float, default=CHRONIC_THRESHOLD,
+                        help="attendance percentage below which a student is flagged")
+    parser.add_argument("--json", help="write the report to this file")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        run_benchmark(args.benchmark)
+        return 0
+
+    if args.class_name:
+        class_filter, title = {"class_name": args.class_name}, f"Class {args.class_name}"
+    else:
+        class_filter = {"class_name": {"$regex": f"^{args.department}-"}}
+        title = f"Department {args.department}"
+
+    client = MongoClient(MONGO_URL)
+    try:
+        start = time.perf_counter()
+        columns = load_columns(client[MONGO_DB], class_filter, args.start, args.end)
+        loaded = time.perf_counter()
+        report = compute_report(columns, args.chronic_threshold)
+        computed = time.perf_counter()
+    finally:
+        client.close()
+
+    if not columns.students:
+        print(f"❌ No students found for {title}")
+        return 1
+
+    print_report(report, title)
+    print(f"\n   Loaded in {(loaded - start) * 1000:.0f} ms, "
+          f"computed in {(computed - loaded) * 1000:.0f} ms")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"   Report written to {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Index provisioning and query-plan audit for the attendance database.
+
+INDEXES declares the indexes the backend's hot queries rely on, and
+ensure_indexes() reconciles a database against them (create missing ones,
+rebuild ones whose definition changed). The audit runs explain() on the
+query each endpoint issues and fails if any plan falls back to COLLSCAN.
+
+Usage:
+    python -m audit_query_plans            # audit only
+    python -m audit_query_plans --apply    # reconcile indexes, then audit
+"""
+
+import argparse
+import os
+import sys
+from datetime import datetime
+
+from pymongo import ASCENDING, MongoClient
+from pymongo.errors import OperationFailure
+
+# Configuration
+MONGO_URL = os.getenv("MONGO_URL", "mongodb://localhost:27017/")
+MONGO_DB = os.getenv("MONGO_DB", "attendance_system")
+
+# collection -> [(index name, keys, options)]
+INDEXES = {
+    "attendance": [
+        # One record per student per day; the prefix also serves the month views
+        ("admission_year_month_date",
+         [("admission_no", ASCENDING), ("year", ASCENDING), ("month", ASCENDING), ("date", ASCENDING)],
+         {"unique": True}),
+    ],
+    "credits": [
+        ("admission_year_month",
+         [("admission_no", ASCENDING), ("year", ASCENDING), ("month", ASCENDING)],
+         {"unique": True}),
+    ],
+    "students": [
+        ("admission_no_unique", [("admission_no", ASCENDING)], {"unique": True}),
+        ("class_admission_no", [("class_name", ASCENDING), ("admission_no", ASCENDING)], {}),
+        # Partial rather than sparse: a sparse index still holds explicit nulls,
+        # so unregistered students stored with nfc_uid: None would collide
+        ("nfc_uid_unique", [("nfc_uid", ASCENDING)],
+         {"unique": True, "partialFilterExpression": {"nfc_uid": {"$type": "string"}}}),
+    ],
+    "attendance_archive": [
+        # Whole-year reads of the archive (reports and exports without a student filter)
+        ("academic_year_admission_no", [("academic_year", ASCENDING), ("admission_no", ASCENDING)], {}),
+    ],
+}
+
+# Index options that are part of the definition when comparing with the server
+COMPARED_OPTIONS = ("unique", "sparse", "partialFilterExpression", "expireAfterSeconds")
+
+
+def _index_matches(existing, keys, options):
+    """Check whether a server index definition matches a declared one"""
+    if list(existing["key"].items()) != keys:
+        return False
+    return all(existing.get(opt) == options.get(opt) for opt in COMPARED_OPTIONS)
+
+
+def ensure_indexes(db, verbose=False):
+    """
+    Reconcile the declared INDEXES with the database.
+
+    Missing indexes are created and indexes whose keys or options changed are
+    dropped and rebuilt. An index with the declared keys and options but
+    another name (e.g. the default `admission_no_1`) is adopted as is, since
+    MongoDB cannot rename indexes and creating a second one with the same
+    keys fails; one with the same keys but other options is replaced.
+    Indexes that are not declared are left alone.
+    Returns a list of (collection, index name, action) tuples.
+    """
+    actions = []
+    for collection_name, declared in INDEXES.items():
+        collection = db[collection_name]
+        existing = {index["name"]: index for index in collection.list_indexes()}
+        accounted = {"_id_"}
+
+        for name, keys, options in declared:
+            current = existing.get(name)
+            if current is not None and _index_matches(current, keys, options):
+                actions.append((collection_name, name, "ok"))
+                accounted.add(name)
+                continue
+            same_keys = next((index for index in existing.values()
+                              if index["name"] != name and list(index["key"].items()) == keys), None)
+            if same_keys is not None and _index_matches(same_keys, keys, options):
+                actions.append((collection_name, name, f"adopted {same_keys['name']}"))
+                accounted.add(same_keys["name"])
+                continue
+
+            action = "created"
+            for stale in (current, same_keys):
+                if stale is not None:
+                    collection.drop_index(stale["name"])
+                    accounted.add(stale["name"])
+                    action = "rebuilt"
+            collection.create_index(keys, name=name, **options)
+            actions.append((collection_name, name, action))
+            accounted.add(name)
+
+        for name in existing:
+            if name not in accounted:
+                actions.append((collection_name, name, "undeclared"))
+
+    if verbose:
+        for collection_name, name, action in actions:
+            print(f"   {collection_name}.{name}: {action}")
+    return actions
+
+
+def sample_values(db):
+    """Pick real key values so the audited plans match production shapes"""
+    now = datetime.now()
+    student = db["students"].find_one({}, {"admission_no": 1, "class_name": 1}) or {}
+    nfc_student = db["students"].find_one({"nfc_uid": {"$type": "string"}}, {"nfc_uid": 1}) or {}
+    return {
+        "admission_no": student.get("admission_no", "ADM123"),
+        "class_name": student.get("class_name", "10-A"),
+        "nfc_uid": nfc_student.get("nfc_uid", "A1B2C3D4"),
+        "year": now.year,
+        "month": now.month,
+        "date": now.day,
+    }
+
+
+def hot_queries(values):
+    """(endpoint, collection, filter) for every query on a request hot path"""
+    month = {"admission_no": values["admission_no"], "year": values["year"], "month": values["month"]}
+    return [
+        ("GET /view_attendance/{admission_no}", "attendance", month),
+        ("GET /staff_actions/{admission_no}", "attendance", month),
+        ("GET /staff_dashboard/{class_name}", "students", {"class_name": values["class_name"]}),
+        ("GET /staff_dashboard/{class_name}", "attendance", dict(month, date=values["date"])),
+        ("get_or_create_credits", "credits", month),
+        ("GET /students/{admission_no}", "students", {"admission_no": values["admission_no"]}),
+        ("POST /nfc/attendance", "students", {"nfc_uid": values["nfc_uid"]}),
+        ("iter_archived (whole year)", "attendance_archive", {"academic_year": values["year"] - 1}),
+    ]
+
+
+def plan_stages(plan):
+    """Yield every stage name in an explain() plan tree"""
+    if "stage" in plan:
+        yield plan["stage"]
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            yield from plan_stages(plan[key])
+    for child in plan.get("inputStages", []):
+        yield from plan_stages(child)
+
+
+def audit(db):
+    """Explain every hot query; return the ones whose plan scans the collection"""
+    failures = []
+    for endpoint, collection_name, query in hot_queries(sample_values(db)):
+        explain = db[collection_name].find(query).explain()
+        winning = explain["queryPlanner"]["winningPlan"]
+        stages = list(plan_stages(winning))
+        index_name = next(_find_index_names(winning), None)
+
+        if "COLLSCAN" in stages:
+            print(f"❌ {endpoint}: {collection_name} {sorted(query)} -> COLLSCAN")
+            failures.append((endpoint, collection_name, query))
+        else:
+            print(f"✅ {endpoint}: {collection_name} {sorted(query)} -> {index_name or ' > '.join(stages)}")
+    return failures
+
+
+def _find_index_names(plan):
+    """Yield the index names used by IXSCAN stages in a plan tree"""
+    if plan.get("stage") == "IXSCAN" and "indexName" in plan:
+        yield plan["indexName"]
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            yield from _find_index_names(plan[key])
+    for child in plan.get("inputStages", []):
+        yield from _find_index_names(child)
+
+
+def main():
+    """Optionally reconcile indexes, then audit the hot query plans"""
+    parser = argparse.ArgumentParser(description="Audit attendance query plans for collection scans")
+    parser.add_argument("--apply", action="store_true", help="create or rebuild declared indexes first")
+    args = parser.parse_args()
+
+    client = MongoClient(MONGO_URL)
+    db = client[MONGO_DB]
+    try:
+        if args.apply:
+            print("🔧 Reconciling indexes")
+            try:
+                ensure_indexes(db, verbose=True)
+            except OperationFailure as e:
+                # Typically a unique index over data that already has duplicates
+                print(f"❌ Index reconciliation failed: {e}")
+                return 1
+
+        print("🔍 Auditing query plans")
+        failures = audit(db)
+    finally:
+        client.close()
+
+    if failures:
+        print(f"\n❌ {len(failures)} query plan(s) fall back to COLLSCAN; run with --apply")
+        return 1
+    print("\n✅ Every hot query is served by an index")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
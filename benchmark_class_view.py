@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the class dashboard endpoints.
+
+Seeds synthetic classes of increasing size straight into MongoDB, then times
+/staff_dashboard/{class_name} and /hod_dashboard/{class_name} for each one.
+With a batched class view the latency should stay roughly flat as the class
+grows; a per-student query loop shows up as latency growing with class size.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import datetime
+
+import requests
+from pymongo import MongoClient
+
+# Configuration
+BACKEND_URL = "http://localhost:8000"
+MONGO_URL = os.getenv("MONGO_URL", "mongodb://localhost:27017/")
+MONGO_DB = os.getenv("MONGO_DB", "attendance_system")
+CLASS_SIZES = [30, 100, 300, 1000, 3000]
+BENCH_PREFIX = "BENCH"
+TIMEOUT = 30
+
+
+def bench_class_name(size):
+    """Name of the synthetic class holding `size` students"""
+    return f"{BENCH_PREFIX}-{size}"
+
+
+def seed_class(db, size):
+    """Insert `size` students plus today's attendance for a benchmark class"""
+    class_name = bench_class_name(size)
+    clear_class(db, size)
+
+    now = datetime.now()
+    admission_nos = [f"{BENCH_PREFIX}{size}-{i:05d}" for i in range(size)]
+    db["students"].insert_many([
+        {
+            "admission_no": admission_no,
+            "name": f"Bench Student {i}",
+            "student_id": f"BSTU{size}-{i:05d}",
+            "class_name": class_name,
+            "section": "A",
+            "created_at": datetime.utcnow()
+        }
+        for i, admission_no in enumerate(admission_nos)
+    ], ordered=False)
+
+    # Leave every fifth student without a record so the "Absent" path is hit too
+    db["attendance"].insert_many([
+        {
+            "admission_no": admission_no,
+            "year": now.year,
+            "month": now.month,
+            "date": now.day,
+            "attendance": {"morning": "Present", "evening": "NA"},
+            "updatedBy": "benchmark",
+            "lastUpdatedAt": datetime.utcnow(),
+            "is_manual": False
+        }
+        for i, admission_no in enumerate(admission_nos) if i % 5
+    ], ordered=False)
+
+
+def clear_class(db, size):
+    """Remove every document created for a benchmark class"""
+    prefix = {"$regex": f"^{BENCH_PREFIX}{size}-"}
+    db["students"].delete_many({"class_name": bench_class_name(size)})
+    db["attendance"].delete_many({"admission_no": prefix})
+    db["credits"].delete_many({"admission_no": prefix})
+
+
+def time_endpoint(session, url, params, repeat):
+    """Return per-request latencies in milliseconds, or None on failure"""
+    # One untimed call so credit documents created on first view are not counted
+    response = session.get(url, params=params, timeout=TIMEOUT)
+    if response.status_code != 200:
+        print(f"❌ {url} returned {response.status_code}: {response.text[:100]}")
+        return None
+
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = session.get(url, params=params, timeout=TIMEOUT)
+        latencies.append((time.perf_counter() - start) * 1000)
+        if response.status_code != 200:
+            print(f"❌ {url} returned {response.status_code}")
+            return None
+    return latencies
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def main():
+    """Seed each class size, time both dashboards and print the results"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", default=BACKEND_URL, help="backend base URL")
+    parser.add_argument("--sizes", type=int, nargs="+", default=CLASS_SIZES,
+                        help="class sizes to benchmark")
+    parser.add_argument("--repeat", type=int, default=20, help="timed requests per endpoint")
+    parser.add_argument("--staff-user", default="staff1", help="username for /staff_dashboard")
+    parser.add_argument("--hod-user", default="hod1", help="username for /hod_dashboard")
+    parser.add_argument("--token", help="bearer token sent with every request")
+    parser.add_argument("--max-ratio", type=float,
+                        help="fail if median latency of the largest class exceeds "
+                             "this multiple of the smallest")
+    parser.add_argument("--keep", action="store_true", help="keep the seeded classes afterwards")
+    args = parser.parse_args()
+
+    client = MongoClient(MONGO_URL)
+    db = client[MONGO_DB]
+    session = requests.Session()
+    if args.token:
+        session.headers["Authorization"] = f"Bearer {args.token}"
+
+    endpoints = [
+        ("staff_dashboard", args.staff_user),
+        ("hod_dashboard", args.hod_user),
+    ]
+    results = {name: {} for name, _ in endpoints}
+
+    print("🧪 Class view benchmark")
+    print("=" * 60)
+    try:
+        for size in sorted(args.sizes):
+            seed_class(db, size)
+            for name, username in endpoints:
+                url = f"{args.url}/{name}/{bench_class_name(size)}"
+                latencies = time_endpoint(session, url, {"username": username}, args.repeat)
+                if latencies is None:
+                    return 1
+                results[name][size] = latencies
+    finally:
+        if not args.keep:
+            for size in args.sizes:
+                clear_class(db, size)
+        client.close()
+
+    failed = False
+    for name, by_size in results.items():
+        print(f"\n{name}")
+        print(f"   {'students':>8}  {'p50 ms':>8}  {'p95 ms':>8}  {'max ms':>8}")
+        for size, latencies in sorted(by_size.items()):
+            print(f"   {size:>8}  {statistics.median(latencies):>8.1f}  "
+                  f"{percentile(latencies, 95):>8.1f}  {max(latencies):>8.1f}")
+
+        sizes = sorted(by_size)
+        ratio = statistics.median(by_size[sizes[-1]]) / statistics.median(by_size[sizes[0]])
+        print(f"   growth {sizes[0]} → {sizes[-1]} students: {ratio:.2f}x")
+        if args.max_ratio is not None and ratio > args.max_ratio:
+            print(f"❌ {name} latency grew {ratio:.2f}x (limit {args.max_ratio}x)")
+            failed = True
+
+    print("\n" + "=" * 60)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
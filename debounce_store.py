@@ -0,0 +1,207 @@
+"""
+Bounded debounce stores for NFC taps.
+
+A tap is accepted the first time a UID is seen and suppressed for the next
+`ttl` seconds. Both stores expose the same interface:
+
+    store.check_and_set(nfc_uid)  -> True if the tap should be processed
+    store.stats()                 -> size, capacity, hits, misses
+    store.clear()
+
+MemoryDebounceStore is for a single process. Because the TTL is fixed,
+insertion order is also expiry order, so an OrderedDict acts as the
+time-ordered wheel: expired entries are popped from the front and the
+memory cap evicts the oldest entry, both in O(1).
+
+SQLiteDebounceStore shares state between processes (e.g. several Uvicorn
+workers or reader daemons on one host) through a small local SQLite file.
+A single upsert statement does the check-and-set atomically, and the hit
+and miss counters live in the same file, so stats() covers every process.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+DEBOUNCE_SECONDS = 10
+MAX_ENTRIES = 50000
+PURGE_EVERY = 1000
+
+
+class DebounceStore(ABC):
+    """Interface shared by the debounce store implementations"""
+
+    def __init__(self, ttl=DEBOUNCE_SECONDS, max_entries=MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+    @abstractmethod
+    def check_and_set(self, key, now=None):
+        """Return True and start the debounce window if `key` is not in one"""
+
+    @abstractmethod
+    def __len__(self):
+        """Number of keys currently held"""
+
+    @abstractmethod
+    def clear(self):
+        """Forget every key"""
+
+    @abstractmethod
+    def counts(self):
+        """(hits, misses) seen by this store"""
+
+    def stats(self):
+        """Counters for /nfc/status; a hit is a suppressed duplicate tap"""
+        hits, misses = self.counts()
+        total = hits + misses
+        return {
+            "size": len(self),
+            "capacity": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": round(hits / total, 4) if total else 0.0,
+        }
+
+
+class MemoryDebounceStore(DebounceStore):
+    """In-process store with TTL eviction and a hard entry cap"""
+
+    def __init__(self, ttl=DEBOUNCE_SECONDS, max_entries=MAX_ENTRIES):
+        super().__init__(ttl, max_entries)
+        self._expiry = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def check_and_set(self, key, now=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._evict_expired(now)
+            if key in self._expiry:
+                self.hits += 1
+                return False
+
+            if len(self._expiry) >= self.max_entries:
+                self._expiry.popitem(last=False)
+            self._expiry[key] = now + self.ttl
+            self.misses += 1
+            return True
+
+    def _evict_expired(self, now):
+        while self._expiry:
+            key, expires = next(iter(self._expiry.items()))
+            if expires > now:
+                break
+            del self._expiry[key]
+
+    def __len__(self):
+        return len(self._expiry)
+
+    def clear(self):
+        with self._lock:
+            self._expiry.clear()
+
+    def counts(self):
+        return self.hits, self.misses
+
+
+class SQLiteDebounceStore(DebounceStore):
+    """
+    Cross-process store backed by a local SQLite file in WAL mode.
+
+    Expired rows and rows beyond the entry cap are purged every PURGE_EVERY
+    calls, so the table can briefly exceed `max_entries` by that many rows.
+    Hits and misses are counted in the file, in the same transaction as the
+    check-and-set, so they add up across every process sharing it.
+    """
+
+    def __init__(self, path, ttl=DEBOUNCE_SECONDS, max_entries=MAX_ENTRIES):
+        super().__init__(ttl, max_entries)
+        self.path = path
+        self._lock = threading.Lock()
+        self._calls = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=OFF")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS debounce (key TEXT PRIMARY KEY, expires REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS debounce_expires ON debounce (expires)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS debounce_counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)"
+        )
+        self._conn.execute(
+            "INSERT OR IGNORE INTO debounce_counters (name, value) VALUES ('hits', 0), ('misses', 0)"
+        )
+
+    def check_and_set(self, key, now=None):
+        # Wall-clock time, since monotonic clocks are not comparable across processes
+        now = time.time() if now is None else now
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                cursor = self._conn.execute(
+                    "INSERT INTO debounce (key, expires) VALUES (?, ?) "
+                    "ON CONFLICT (key) DO UPDATE SET expires = excluded.expires "
+                    "WHERE debounce.expires <= ?",
+                    (key, now + self.ttl, now),
+                )
+                accepted = cursor.rowcount == 1
+                self._conn.execute(
+                    "UPDATE debounce_counters SET value = value + 1 WHERE name = ?",
+                    ("misses" if accepted else "hits",),
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+            self._calls += 1
+            if self._calls % PURGE_EVERY == 0:
+                self._purge(now)
+        return accepted
+
+    def _purge(self, now):
+        """Drop expired rows, then the oldest rows beyond the entry cap"""
+        self._conn.execute("DELETE FROM debounce WHERE expires <= ?", (now,))
+        self._conn.execute(
+            "DELETE FROM debounce WHERE key IN ("
+            " SELECT key FROM debounce ORDER BY expires DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM debounce").fetchone()[0]
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM debounce")
+
+    def counts(self):
+        with self._lock:
+            counters = dict(self._conn.execute("SELECT name, value FROM debounce_counters"))
+        return counters["hits"], counters["misses"]
+
+    def close(self):
+        """Close the underlying database"""
+        with self._lock:
+            self._conn.close()
+
+
+def create_debounce_store(ttl=DEBOUNCE_SECONDS, max_entries=MAX_ENTRIES):
+    """
+    Build the store selected by the environment.
+
+    NFC_DEBOUNCE_DB set to a file path selects the shared SQLite store;
+    otherwise the in-process store is used.
+    """
+    path = os.getenv("NFC_DEBOUNCE_DB")
+    if path:
+        return SQLiteDebounceStore(path, ttl, max_entries)
+    return MemoryDebounceStore(ttl, max_entries)
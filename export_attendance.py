@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Streaming attendance export to CSV, NDJSON, Parquet or Excel.
+
+Rows are read from a MongoDB cursor in batches and written as they arrive,
+so memory stays flat however large the export is and the first bytes go
+out as soon as the first batch is back. Archived academic years (see
+archive_attendance.py) are streamed after the hot collection.
+iter_csv_chunks() and iter_ndjson_chunks() yield encoded chunks and can be
+handed straight to a FastAPI StreamingResponse. Parquet (pyarrow) and XLSX
+(openpyxl) files are written one row group / row at a time; XLSX exports
+past a worksheet's 1,048,576 rows continue on further sheets.
+
+Usage:
+    python export_attendance.py --year 2025 --format csv > attendance_2025.csv
+    python export_attendance.py --class 10-A --year 2025 --month 9 --format xlsx -o sept.xlsx
+    python export_attendance.py --year 2025 --format parquet -o attendance_2025.parquet
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import time
+from pymongo import MongoClient
+
+from archive_attendance import with_archived
+
+# Configuration
+MONGO_URL = os.getenv("MONGO_URL", "mongodb://localhost:27017/")
+MONGO_DB = os.getenv("MONGO_DB", "attendance_system")
+BATCH_SIZE = 5000
+CHUNK_ROWS = 1000
+ROW_GROUP_ROWS = 100000
+XLSX_MAX_ROWS = 1048576  # rows per worksheet, header included
+COLUMNS = ["admission_no", "name", "class_name", "date", "morning", "evening",
+           "is_manual", "updatedBy", "lastUpdatedAt"]
+PROJECTION = {"_id": 0, "admission_no": 1, "year": 1, "month": 1, "date": 1,
+              "attendance": 1, "is_manual": 1, "updatedBy": 1, "lastUpdatedAt": 1}
+
+
+def build_query(db, class_name=None, admission_no=None, year=None, month=None):
+    """
+    Attendance filter plus the student lookup used to label rows.
+
+    Only the students in scope are loaded, which is bounded by the school's
+    size and not by the number of attendance records.
+    """
+    student_filter = {}
+    if class_name:
+        student_filter["class_name"] = class_name
+    if admission_no:
+        student_filter["admission_no"] = admission_no
+    students = {
+        s["admission_no"]: s
+        for s in db["students"].find(student_filter, {"_id": 0, "admission_no": 1, "name": 1, "class_name": 1})
+    }
+
+    query = {}
+    if class_name or admission_no:
+        query["admission_no"] = {"$in": list(students)}
+    if year is not None:
+        query["year"] = year
+    if month is not None:
+        query["month"] = month
+    return query, students
+
+
+def iter_rows(cursor, students):
+    """Flatten attendance documents into export rows, one at a time"""
+    for record in cursor:
+        student = students.get(record["admission_no"], {})
+        sessions = record.get("attendance", {})
+        updated_at = record.get("lastUpdatedAt")
+        yield {
+            "admission_no": record["admission_no"],
+            "name": student.get("name", ""),
+            "class_name": student.get("class_name", ""),
+            "date": f"{record['year']}-{record['month']:02d}-{record['date']:02d}",
+            "morning": sessions.get("morning", "NA"),
+            "evening": sessions.get("evening", "NA"),
+            "is_manual": bool(record.get("is_manual", False)),
+            "updatedBy": record.get("updatedBy", ""),
+            "lastUpdatedAt": updated_at.isoformat() if updated_at else ""
+        }
+
+
+def iter_csv_chunks(rows, chunk_rows=CHUNK_ROWS):
+    """Yield CSV as UTF-8 byte chunks of `chunk_rows` rows, header first"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=COLUMNS)
+    writer.writeheader()
+    pending = 0
+    for row in rows:
+        writer.writerow(row)
+        pending += 1
+        if pending >= chunk_rows:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    yield buffer.getvalue().encode("utf-8")
+
+
+def iter_ndjson_chunks(rows, chunk_rows=CHUNK_ROWS):
+    """Yield newline-delimited JSON as UTF-8 byte chunks"""
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(row))
+        if len(lines) >= chunk_rows:
+            yield ("\n".join(lines) + "\n").encode("utf-8")
+            lines = []
+    if lines:
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def write_parquet(rows, path, row_group_rows=ROW_GROUP_ROWS):
+    """Write rows to a Parquet file one row group at a time"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([(column, pa.bool_() if column == "is_manual" else pa.string())
+                        for column in COLUMNS])
+    written = 0
+    with pq.ParquetWriter(path, schema, compression="zstd") as writer:
+        batch = {column: [] for column in COLUMNS}
+        for row in rows:
+            for column in COLUMNS:
+                batch[column].append(row[column])
+            if len(batch["date"]) >= row_group_rows:
+                writer.write_table(pa.Table.from_pydict(batch, schema=schema))
+                written += len(batch["date"])
+                batch = {column: [] for column in COLUMNS}
+        if batch["date"]:
+            writer.write_table(pa.Table.from_pydict(batch, schema=schema))
+            written += len(batch["date"])
+    return written
+
+
+def write_xlsx(rows, path, max_rows=XLSX_MAX_ROWS):
+    """
+    Write rows to an Excel file with openpyxl's write-only (streaming) mode.
+
+    A worksheet holds at most `max_rows` rows, so larger exports continue
+    on "Attendance 2", "Attendance 3" and so on, each with its own header.
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheets = 0
+    sheet_rows = max_rows
+    written = 0
+    for row in rows:
+        if sheet_rows >= max_rows:
+            sheets += 1
+            sheet = workbook.create_sheet("Attendance" if sheets == 1 else f"Attendance {sheets}")
+            sheet.append(COLUMNS)
+            sheet_rows = 1
+        sheet.append([row[column] for column in COLUMNS])
+        sheet_rows += 1
+        written += 1
+    if not sheets:
+        workbook.create_sheet("Attendance").append(COLUMNS)
+    workbook.save(path)
+    return written
+
+
+def write_chunks(chunks, output):
+    """Write byte chunks to a binary stream; returns bytes written"""
+    total = 0
+    for chunk in chunks:
+        output.write(chunk)
+        total += len(chunk)
+    output.flush()
+    return total
+
+
+def main():
+    """Export attendance in the requested format"""
+    parser = argparse.ArgumentParser(description="Stream attendance records to a file")
+    parser.add_argument("--format", choices=["csv", "ndjson", "parquet", "xlsx"], default="csv")
+    parser.add_argument("-o", "--output", help="output file (csv/ndjson default to stdout)")
+    parser.add_argument("--class", dest="class_name", help="only this class")
+    parser.add_argument("--admission-no", help="only this student")
+    parser.add_argument("--year", type=int, help="only this year")
+    parser.add_argument("--month", type=int, help="only this month")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="cursor batch size")
+    args = parser.parse_args()
+
+    if args.format in ("parquet", "xlsx") and not args.output:
+        parser.error(f"--output is required for {args.format}")
+
+    client = MongoClient(MONGO_URL)
+    db = client[MONGO_DB]
+    start = time.perf_counter()
+    try:
+        query, students = build_query(db, args.class_name, args.admission_no, args.year, args.month)
+        cursor = db["attendance"].find(query, PROJECTION).batch_size(args.batch_size)
+        # Closed academic years live in the archive; append them after the hot data
+        records = with_archived(db, cursor, query.get("admission_no", {}).get("$in"), args.year, args.month)
+        rows = iter_rows(records, students)
+
+        if args.format == "parquet":
+            summary = f"{write_parquet(rows, args.output):,} rows"
+        elif args.format == "xlsx":
+            summary = f"{write_xlsx(rows, args.output):,} rows"
+        else:
+            chunks = iter_csv_chunks(rows) if args.format == "csv" else iter_ndjson_chunks(rows)
+            if args.output:
+                with open(args.output, "wb") as f:
+                    summary = f"{write_chunks(chunks, f):,} bytes"
+            else:
+                summary = f"{write_chunks(chunks, sys.stdout.buffer):,} bytes"
+    finally:
+        client.close()
+
+    print(f"✅ Exported {summary} in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Scalable synthetic data generator for the attendance database.
+
+Creates N classes of M students (each with an NFC UID) and Y years of
+two-session attendance with realistic absence patterns, plus the monthly
+credit documents that the recorded manual marks imply. Documents are
+generated lazily and written with large unordered insert_many batches, so
+tens of millions of records load without being held in memory. The same
+--seed and --end-date always produce the same dataset, timestamps included,
+which keeps benchmarks reproducible.
+
+Usage:
+    python generate_data.py --classes 100 --students-per-class 50 --years 3 --drop
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+from pymongo import MongoClient
+from pymongo.errors import BulkWriteError
+
+# Configuration
+MONGO_URL = os.getenv("MONGO_URL", "mongodb://localhost:27017/")
+MONGO_DB = os.getenv("MONGO_DB", "attendance_system")
+BATCH_SIZE = 10000
+SECTIONS = "ABCDEF"
+CREDIT_LIMIT = 4
+MANUAL_RATE = 0.02
+# Throwaway students for the load scripts; their UIDs come from the top half
+# of the nfc_uid() index space so they never collide with generated students
+LOAD_TEST_PREFIX = "LOADTEST"
+LOAD_TEST_CLASS = "LOADTEST-A"
+LOAD_TEST_UID_OFFSET = 1 << 31
+
+FIRST_NAMES = ["Aarav", "Vivaan", "Aditya", "Vihaan", "Arjun", "Sai", "Reyansh", "Ishaan",
+               "Ananya", "Diya", "Priya", "Aadhya", "Saanvi", "Pari", "Kavya", "Meera",
+               "Rahul", "Amit", "Neha", "Pooja", "Rohan", "Sneha", "Karan", "Isha"]
+LAST_NAMES = ["Sharma", "Verma", "Singh", "Gupta", "Kumar", "Patel", "Reddy", "Iyer",
+              "Nair", "Das", "Mehta", "Joshi", "Rao", "Bose", "Kapoor", "Malhotra"]
+
+
+def class_name(index):
+    """Class names run 1-A .. 1-F, 2-A .. and so on"""
+    return f"{index // len(SECTIONS) + 1}-{SECTIONS[index % len(SECTIONS)]}"
+
+
+def nfc_uid(index):
+    """Unique 8-hex-digit UID; odd-multiplier hashing is a bijection on 32 bits"""
+    return f"{(index * 2654435761 + 0x1B873593) & 0xFFFFFFFF:08X}"
+
+
+def school_days(years, end=None):
+    """Every school day (Monday to Saturday) from January 1st `years` calendar years back to `end`"""
+    end = end or date.today()
+    day = date(end.year - years + 1, 1, 1)
+    while day <= end:
+        if day.weekday() != 6:
+            yield day
+        day += timedelta(days=1)
+
+
+def generate_students(args):
+    """Yield student documents; the student's index drives every other field"""
+    rng = random.Random(args.seed)
+    # Registered on the first day of attendance (see school_days)
+    created_at = datetime(args.end_date.year - args.years + 1, 1, 1)
+    for class_index in range(args.classes):
+        for roll in range(args.students_per_class):
+            index = class_index * args.students_per_class + roll
+            yield {
+                "admission_no": f"ADM{index:07d}",
+                "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                "student_id": f"STU{index:07d}",
+                "class_name": class_name(class_index),
+                "section": SECTIONS[class_index % len(SECTIONS)],
+                "nfc_uid": nfc_uid(index),
+                "created_at": created_at
+            }
+
+
+def generate_attendance(args, days, credits_out):
+    """
+    Yield attendance documents for every student and school day.
+
+    Each student gets a personal absence rate (most are regular, a few are
+    chronically absent), absences cluster into multi-day sick spells,
+    Mondays and Saturdays are slightly worse, and some days only one
+    session is missed. Manual marks are tallied per student-month, capped
+    at the monthly credit limit, and each student's credit documents are
+    handed to `credits_out.extend()` once their days are done. Records are
+    stamped with the evening of their own day.
+    """
+    total = args.classes * args.students_per_class
+    for index in range(total):
+        # Per-student RNG so the output does not depend on iteration order
+        rng = random.Random(args.seed * 1000003 + index)
+        admission_no = f"ADM{index:07d}"
+        uid = nfc_uid(index)
+        chronic = rng.random() < 0.05
+        absence_rate = rng.uniform(0.15, 0.35) if chronic else rng.betavariate(2, 40)
+        sick_days_left = 0
+        manual_by_month = {}
+
+        for day in days:
+            if sick_days_left:
+                sick_days_left -= 1
+                morning = evening = "Absent"
+            else:
+                rate = absence_rate * (1.3 if day.weekday() in (0, 5) else 1.0)
+                roll = rng.random()
+                if roll < rate * 0.15:
+                    sick_days_left = rng.randint(1, 4)
+                    morning = evening = "Absent"
+                elif roll < rate * 0.75:
+                    morning = evening = "Absent"
+                elif roll < rate:
+                    # Half day: arrived late or left early
+                    morning, evening = rng.choice([("Absent", "Present"), ("Present", "Absent")])
+                else:
+                    morning = evening = "Present"
+
+            month_key = (day.year, day.month)
+            is_manual = (morning == "Present" or evening == "Present") \
+                and manual_by_month.get(month_key, 0) < CREDIT_LIMIT \
+                and rng.random() < MANUAL_RATE
+            if is_manual:
+                manual_by_month[month_key] = manual_by_month.get(month_key, 0) + 1
+
+            record = {
+                "admission_no": admission_no,
+                "year": day.year,
+                "month": day.month,
+                "date": day.day,
+                "attendance": {"morning": morning, "evening": evening},
+                "updatedBy": "staff1" if is_manual else "nfc_system",
+                "lastUpdatedAt": datetime(day.year, day.month, day.day, 17),
+                "is_manual": is_manual
+            }
+            if not is_manual:
+                record["is_nfc"] = True
+                record["nfc_uid"] = uid
+            yield record
+
+        credits_out.extend({
+            "admission_no": admission_no,
+            "year": year,
+            "month": month,
+            "used": used,
+            "limit": CREDIT_LIMIT
+        } for (year, month), used in manual_by_month.items())
+
+
+def seed_load_students(db, count):
+    """
+    Create `count` dedicated load-test students with registered UIDs.
+
+    Any earlier load-test students, and their attendance and credits, are
+    removed first. Returns the student documents.
+    """
+    remove_load_students(db)
+    created_at = datetime.utcnow()
+    students = [{
+        "admission_no": f"{LOAD_TEST_PREFIX}{i:07d}",
+        "name": f"Load Test {i}",
+        "student_id": f"{LOAD_TEST_PREFIX}{i:07d}",
+        "class_name": LOAD_TEST_CLASS,
+        "section": "A",
+        "nfc_uid": nfc_uid(LOAD_TEST_UID_OFFSET + i),
+        "created_at": created_at
+    } for i in range(count)]
+    for batch in batched(students, BATCH_SIZE):
+        db["students"].insert_many([dict(student) for student in batch], ordered=False)
+    return students
+
+
+def remove_load_students(db):
+    """Delete the load-test students and everything recorded for them"""
+    selector = {"admission_no": {"$regex": f"^{LOAD_TEST_PREFIX}"}}
+    for name in ("students", "attendance", "credits"):
+        db[name].delete_many(selector)
+
+
+def batched(iterable, size):
+    """Yield lists of up to `size` items without materializing the iterable"""
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def insert_batch(collection, batch):
+    """Unordered insert_many; returns the number of documents inserted"""
+    try:
+        return len(collection.insert_many(batch, ordered=False).inserted_ids)
+    except BulkWriteError as e:
+        # Unordered inserts keep going past duplicates; count what landed
+        return e.details.get("nInserted", 0)
+
+
+class BatchSink:
+    """extend()-able target that inserts into a collection every `batch_size` documents"""
+
+    def __init__(self, collection, batch_size):
+        self.collection = collection
+        self.batch_size = batch_size
+        self.pending = []
+        self.inserted = 0
+
+    def extend(self, documents):
+        """Queue documents, inserting once a batch is full"""
+        self.pending.extend(documents)
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Insert whatever is queued"""
+        if self.pending:
+            self.inserted += insert_batch(self.collection, self.pending)
+            self.pending = []
+
+
+def load(collection, documents, batch_size, label):
+    """Stream documents into a collection; returns the number inserted"""
+    inserted = 0
+    start = time.perf_counter()
+    for batch_number, batch in enumerate(batched(documents, batch_size), 1):
+        inserted += insert_batch(collection, batch)
+        if batch_number % 50 == 0:
+            rate = inserted / (time.perf_counter() - start)
+            print(f"   {label}: {inserted:,} ({rate:,.0f} docs/s)")
+    elapsed = time.perf_counter() - start
+    print(f"✅ {label}: {inserted:,} documents in {elapsed:.1f}s")
+    return inserted
+
+
+def main():
+    """Generate and load the synthetic dataset"""
+    parser = argparse.ArgumentParser(description="Generate synthetic attendance data")
+    parser.add_argument("--classes", type=int, default=10, help="number of classes")
+    parser.add_argument("--students-per-class", type=int, default=40, help="students in each class")
+    parser.add_argument("--years", type=int, default=1, help="calendar years of attendance")
+    parser.add_argument("--end-date", type=date.fromisoformat, default=date.today(),
+                        help="last attendance day, YYYY-MM-DD (pin it for reproducible runs)")
+    parser.add_argument("--seed", type=int, default=42, help="random seed")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="documents per insert_many")
+    parser.add_argument("--drop", action="store_true",
+                        help="clear students, attendance and credits first")
+    parser.add_argument("--indexes", action="store_true",
+                        help="create the declared indexes after loading (see audit_query_plans.py)")
+    args = parser.parse_args()
+
+    days = list(school_days(args.years, args.end_date))
+    students_total = args.classes * args.students_per_class
+    print("🌱 Generating synthetic attendance data")
+    print(f"   {args.classes} classes x {args.students_per_class} students, "
+          f"{len(days)} school days -> ~{students_total * len(days):,} attendance documents")
+
+    client = MongoClient(MONGO_URL)
+    db = client[MONGO_DB]
+    try:
+        if args.drop:
+            for name in ("students", "attendance", "credits"):
+                db[name].drop()
+
+        # Credits are written alongside attendance, a batch at a time
+        credits = BatchSink(db["credits"], args.batch_size)
+        load(db["students"], generate_students(args), args.batch_size, "students")
+        load(db["attendance"], generate_attendance(args, days, credits), args.batch_size, "attendance")
+        credits.flush()
+        print(f"✅ credits: {credits.inserted:,} documents")
+
+        if args.indexes:
+            from audit_query_plans import ensure_indexes
+            print("🔧 Building indexes")
+            ensure_indexes(db, verbose=True)
+    finally:
+        client.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Login storm vs tap-in latency load script.
+
+Runs in two phases against a live backend:
+  1. taps only      - baseline /nfc/attendance latency
+  2. taps + logins  - the same tap load while workers hammer /token
+It reports login throughput and status codes (503s mean the backend shed
+load) and how much tap latency degrades while logins run, which shows
+whether bcrypt verification is starving the tap path.
+
+Taps use dedicated load-test students seeded into MongoDB (see
+generate_data.seed_load_students) and walk their UIDs in rotation, with
+each phase on its own half of the pool. A UID therefore comes back only
+after the whole half has been tapped, well outside the debounce window,
+so the taps exercise the student lookup and attendance upsert. Responses
+that were debounced anyway are counted but left out of the latencies.
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from itertools import count
+
+import requests
+from pymongo import MongoClient
+
+from benchmark_class_view import percentile
+from debounce_store import DEBOUNCE_SECONDS
+from generate_data import remove_load_students, seed_load_students
+
+# Configuration
+BASE_URL = "http://localhost:8000"
+MONGO_URL = os.getenv("MONGO_URL", "mongodb://localhost:27017/")
+MONGO_DB = os.getenv("MONGO_DB", "attendance_system")
+LOGIN = {"username": "hod@demo.com", "password": "password123"}
+LOAD_STUDENTS = 10000
+TIMEOUT = 30
+
+
+def is_debounced(response):
+    """True if the backend ignored the tap as a duplicate inside the debounce window"""
+    if response.status_code == 429:
+        return True
+    text = response.text.lower()
+    return response.status_code < 300 and ("duplicate" in text or "debounc" in text)
+
+
+def tap_worker(base_url, uids, rotation, stop, latencies, statuses, lock):
+    """Post taps back to back, each with the next UID of the shared rotation"""
+    session = requests.Session()
+    while not stop.is_set():
+        with lock:
+            uid = uids[next(rotation) % len(uids)]
+        start = time.perf_counter()
+        try:
+            response = session.post(f"{base_url}/nfc/attendance", json={"nfc_uid": uid}, timeout=TIMEOUT)
+            status = "debounced" if is_debounced(response) else response.status_code
+        except requests.RequestException:
+            status = 0
+        elapsed = (time.perf_counter() - start) * 1000
+        with lock:
+            if status != "debounced":
+                latencies.append(elapsed)
+            statuses[status] += 1
+
+
+def login_worker(base_url, stop, statuses, lock):
+    """Log in with the demo credentials back to back until told to stop"""
+    session = requests.Session()
+    headers = {"Content-Type": "application/x-www-form-urlencoded"}
+    while not stop.is_set():
+        try:
+            response = session.post(f"{base_url}/token", data=LOGIN, headers=headers, timeout=TIMEOUT)
+            status = response.status_code
+            if status == 503:
+                # Honour the backend's backpressure hint, as a real client would
+                retry_after = float(response.headers.get("Retry-After", 1))
+                stop.wait(min(retry_after, 5))
+        except requests.RequestException:
+            status = 0
+        with lock:
+            statuses[status] += 1
+
+
+def run_phase(base_url, uids, duration, tap_workers, login_workers):
+    """Run one phase; returns (tap latencies, tap statuses, login statuses)"""
+    stop = threading.Event()
+    lock = threading.Lock()
+    rotation = count()
+    latencies, tap_statuses, login_statuses = [], Counter(), Counter()
+
+    threads = [threading.Thread(target=tap_worker,
+                                args=(base_url, uids, rotation, stop, latencies, tap_statuses, lock))
+               for _ in range(tap_workers)]
+    threads += [threading.Thread(target=login_worker, args=(base_url, stop, login_statuses, lock))
+                for _ in range(login_workers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return latencies, tap_statuses, login_statuses
+
+
+def print_taps(label, latencies, statuses, duration, pool_size):
+    """Print tap latency percentiles for one phase"""
+    print(f"   {label}: {len(latencies) / duration:.1f} taps/s, "
+          f"p50 {percentile(latencies, 50):.1f} ms, "
+          f"p95 {percentile(latencies, 95):.1f} ms, "
+          f"p99 {percentile(latencies, 99):.1f} ms, "
+          f"statuses {dict(sorted(statuses.items(), key=str))}")
+    taps = sum(statuses.values())
+    wrapped = taps > pool_size and taps / duration * DEBOUNCE_SECONDS >= pool_size
+    if statuses.get("debounced") or wrapped:
+        print(f"   ⚠️  {taps / duration:.0f} taps/s reuses a UID within {DEBOUNCE_SECONDS}s "
+              f"with {pool_size} UIDs per phase; raise --students")
+
+
+def main():
+    """Run the baseline and mixed phases and compare tap latency"""
+    parser = argparse.ArgumentParser(description="Measure tap latency during a login storm")
+    parser.add_argument("--url", default=BASE_URL, help="backend base URL")
+    parser.add_argument("--duration", type=float, default=15, help="seconds per phase")
+    parser.add_argument("--tap-workers", type=int, default=8, help="concurrent tap clients")
+    parser.add_argument("--login-workers", type=int, default=32, help="concurrent login clients")
+    parser.add_argument("--students", type=int, default=LOAD_STUDENTS,
+                        help="dedicated load-test students to seed (half per phase)")
+    parser.add_argument("--keep", action="store_true", help="keep the load-test students afterwards")
+    parser.add_argument("--max-p95-increase", type=float,
+                        help="fail if tap p95 during logins exceeds baseline by this factor")
+    args = parser.parse_args()
+
+    print("=== Login storm vs tap latency ===")
+    try:
+        requests.get(f"{args.url}/health", timeout=TIMEOUT)
+    except requests.RequestException as e:
+        print(f"❌ Backend not reachable at {args.url}: {e}")
+        return 1
+
+    client = MongoClient(MONGO_URL)
+    db = client[MONGO_DB]
+    try:
+        uids = [student["nfc_uid"] for student in seed_load_students(db, args.students)]
+        half = len(uids) // 2
+        print(f"   Seeded {len(uids)} load-test students")
+
+        print(f"\n1. Taps only ({args.tap_workers} workers, {args.duration:.0f}s)")
+        base_latencies, base_statuses, _ = run_phase(args.url, uids[:half], args.duration, args.tap_workers, 0)
+        print_taps("baseline", base_latencies, base_statuses, args.duration, half)
+
+        print(f"\n2. Taps + logins ({args.login_workers} login workers)")
+        mixed_latencies, mixed_statuses, login_statuses = run_phase(
+            args.url, uids[half:], args.duration, args.tap_workers, args.login_workers)
+        print_taps("during logins", mixed_latencies, mixed_statuses, args.duration, len(uids) - half)
+        print(f"   logins: {login_statuses.get(200, 0) / args.duration:.1f} successful/s, "
+              f"statuses {dict(sorted(login_statuses.items()))}")
+    finally:
+        if not args.keep:
+            remove_load_students(db)
+        client.close()
+
+    base_p95 = percentile(base_latencies, 95)
+    mixed_p95 = percentile(mixed_latencies, 95)
+    factor = mixed_p95 / base_p95 if base_p95 else 0.0
+    print(f"\n   tap p95 increase under login load: {factor:.2f}x")
+
+    if args.max_p95_increase is not None and factor > args.max_p95_increase:
+        print(f"❌ Tap p95 degraded {factor:.2f}x (limit {args.max_p95_increase}x)")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
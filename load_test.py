@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""
+Concurrent load test and latency benchmark for the attendance API.
+
+Replays realistic request mixes with asyncio + httpx over pooled keep-alive
+connections and reports p50/p95/p99 latency, requests per second and error
+rate per scenario. Results can be written as JSON, compared against a
+previous run and turned into a pass/fail gate.
+
+Scenarios:
+    tap        POST /nfc/attendance               (card tap at a gate)
+    dashboard  GET  /staff_dashboard/{class_name} (staff dashboard poll)
+    login      POST /token                        (user login)
+    manual     POST /manual_attendance            (staff manual mark)
+
+Usage:
+    python load_test.py --mix morning --duration 30 --json run.json
+    python load_test.py --baseline run.json --max-regression 1.25
+    python load_test.py --app app.main:app        # in-process, no server
+
+With --app the ASGI application is imported and driven in-process through
+httpx's ASGI transport, so only the app's own MongoDB (a local mongod or
+an in-process fake such as mongomock) is needed.
+
+The tap and manual scenarios run against dedicated load-test students
+seeded into MongoDB (see generate_data.seed_load_students) and removed
+afterwards, never against real students. Taps walk the UIDs in rotation
+so a card only comes back after the whole pool, outside the debounce
+window, and manual marks rotate through the students so each one spends
+its monthly credits last. With --load-students 0 nothing is seeded: taps
+rotate through the UIDs the API lists and the manual scenario is dropped.
+"""
+
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import random
+import sys
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+
+import httpx
+
+from benchmark_class_view import percentile
+from load_login_taps import is_debounced
+
+# Configuration
+BASE_URL = "http://localhost:8000"
+MONGO_URL = os.getenv("MONGO_URL", "mongodb://localhost:27017/")
+MONGO_DB = os.getenv("MONGO_DB", "attendance_system")
+TIMEOUT = 30
+DEFAULT_CLASS = "10-A"
+DEFAULT_NFC_UIDS = ["A1B2C3D4", "E5F6G7H8", "I9J0K1L2"]
+LOAD_STUDENTS = 10000
+LOGIN = {"username": "hod@demo.com", "password": "password123"}
+
+# mix name -> scenario weights
+MIXES = {
+    "tapin": {"tap": 90, "dashboard": 10},
+    "morning": {"tap": 60, "dashboard": 25, "login": 10, "manual": 5},
+    "dashboard": {"dashboard": 100},
+    "login": {"login": 100},
+}
+
+
+class Workload:
+    """Shared request targets and auth for all workers"""
+
+    def __init__(self, args):
+        self.args = args
+        self.class_name = args.class_name
+        self.students = []
+        self.nfc_uids = list(DEFAULT_NFC_UIDS)
+        self.headers = {}
+        self.params = {"username": args.username}
+        self.taps = 0
+        self.marks = 0
+
+    async def prepare(self, client, db=None, probe_manual=False):
+        """
+        Log in once, then seed load-test students into `db` or discover UIDs
+        from the API. With `probe_manual`, one manual mark is sent first;
+        returns an error message if the setup cannot work, else None.
+        """
+        response = await client.post("/token", data=LOGIN)
+        if response.status_code == 200:
+            token = response.json().get("access_token")
+            if token:
+                self.headers["Authorization"] = f"Bearer {token}"
+
+        if db is not None:
+            from generate_data import LOAD_TEST_CLASS, seed_load_students
+            seeded = seed_load_students(db, self.args.load_students)
+            self.students = [s["admission_no"] for s in seeded]
+            self.nfc_uids = [s["nfc_uid"] for s in seeded]
+            if probe_manual:
+                # Otherwise a staff user who may not mark the class turns the
+                # whole scenario into silent rejections
+                method, path, kwargs = self.request("manual", None)
+                response = await client.request(method, path, headers=self.headers, **kwargs)
+                if response.status_code != 200:
+                    return (f"probe manual mark returned HTTP {response.status_code}: "
+                            f"{response.text[:200]} (check that {self.args.username} may mark "
+                            f"class {LOAD_TEST_CLASS})")
+            return None
+
+        response = await client.get("/students/", headers=self.headers)
+        if response.status_code == 200:
+            students = response.json().get("students", [])
+            self.nfc_uids = [s["nfc_uid"] for s in students if s.get("nfc_uid")] or self.nfc_uids
+        return None
+
+    def request(self, scenario, rng):
+        """(method, path, kwargs) for one request of a scenario"""
+        if scenario == "tap":
+            uid = self.nfc_uids[self.taps % len(self.nfc_uids)]
+            self.taps += 1
+            return "POST", "/nfc/attendance", {"json": {"nfc_uid": uid}}
+        if scenario == "dashboard":
+            return "GET", f"/staff_dashboard/{self.class_name}", {"params": self.params}
+        if scenario == "login":
+            return "POST", "/token", {"data": LOGIN}
+        if scenario == "manual":
+            # One pass over the students per session, stepping back a day every
+            # two passes, so no (student, date, session) is marked twice
+            rounds, index = divmod(self.marks, len(self.students))
+            self.marks += 1
+            day = datetime.now() - timedelta(days=rounds // 2)
+            payload = {
+                "admission_no": self.students[index],
+                "date": day.strftime("%Y-%m-%d"),
+                "session": "morning" if rounds % 2 == 0 else "evening",
+                "status": "Present",
+            }
+            return "POST", "/manual_attendance", {"params": self.params, "json": payload}
+        raise ValueError(f"Unknown scenario: {scenario}")
+
+
+async def worker(client, workload, weights, deadline, seed, results):
+    """Closed-loop client: send the next request as soon as the last returns"""
+    rng = random.Random(seed)
+    scenarios, scenario_weights = list(weights), list(weights.values())
+    while time.perf_counter() < deadline:
+        scenario = rng.choices(scenarios, weights=scenario_weights)[0]
+        method, path, kwargs = workload.request(scenario, rng)
+        headers = workload.headers if scenario != "login" else None
+
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, path, headers=headers, **kwargs)
+            status = response.status_code
+        except httpx.HTTPError:
+            response, status = None, 0
+        elapsed = (time.perf_counter() - start) * 1000
+        if scenario == "tap" and response is not None and is_debounced(response):
+            # A duplicate short-circuit says nothing about the tap path's latency
+            results[scenario]["debounced"] += 1
+            continue
+        results[scenario]["latencies"].append(elapsed)
+        results[scenario]["statuses"][status] += 1
+
+
+def summarize(results, elapsed):
+    """Per-scenario latency/throughput summary, JSON serializable"""
+    summary = {}
+    for scenario, data in sorted(results.items()):
+        latencies, statuses = data["latencies"], data["statuses"]
+        count = len(latencies)
+        # Transport failures and 5xx are errors; 4xx are business rejections
+        # such as unknown cards or exhausted credits
+        errors = statuses.get(0, 0) + sum(n for code, n in statuses.items() if code >= 500)
+        rejected = sum(n for code, n in statuses.items() if 400 <= code < 500)
+        summary[scenario] = {
+            "requests": count,
+            "rps": round(count / elapsed, 2),
+            "p50_ms": round(percentile(latencies, 50), 2),
+            "p95_ms": round(percentile(latencies, 95), 2),
+            "p99_ms": round(percentile(latencies, 99), 2),
+            "max_ms": round(max(latencies), 2) if latencies else 0.0,
+            "error_rate": round(errors / count, 4) if count else 0.0,
+            "rejected_rate": round(rejected / count, 4) if count else 0.0,
+            "debounced": data["debounced"],
+            "statuses": {str(code): n for code, n in sorted(statuses.items())},
+        }
+    return summary
+
+
+def app_database(args):
+    """
+    The database handle the --app application itself uses, so seeded
+    students land where it reads (e.g. an in-process mongomock). --app-db
+    is an attribute of the app's module or a "module:attribute" path, and
+    must be a synchronous pymongo-style Database.
+    """
+    module_name, _, attr = (args.app_db if ":" in args.app_db
+                            else f"{args.app.partition(':')[0]}:{args.app_db}").partition(":")
+    db = getattr(importlib.import_module(module_name), attr, None)
+    if db is None:
+        raise SystemExit(f"❌ {module_name} has no '{attr}' database handle; point --app-db at it")
+    return db
+
+
+def make_client(args):
+    """AsyncClient for a live server or an in-process ASGI app"""
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    if args.app:
+        module_name, _, attr = args.app.partition(":")
+        app = getattr(importlib.import_module(module_name), attr or "app")
+        transport = httpx.ASGITransport(app=app)
+        return httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=TIMEOUT)
+    return httpx.AsyncClient(base_url=args.url, limits=limits, timeout=TIMEOUT)
+
+
+async def run(args):
+    """Warm up, run the mix for the configured duration and summarize"""
+    weights = dict(MIXES[args.mix])
+    results = defaultdict(lambda: {"latencies": [], "statuses": Counter(), "debounced": 0})
+
+    mongo = db = None
+    if args.load_students and args.app:
+        db = app_database(args)
+    elif args.load_students:
+        from pymongo import MongoClient
+        mongo = MongoClient(MONGO_URL)
+        db = mongo[MONGO_DB]
+    elif weights.pop("manual", None):
+        print("⚠️  No load-test students (--load-students 0); skipping the manual scenario")
+
+    try:
+        async with make_client(args) as client:
+            workload = Workload(args)
+            error = await workload.prepare(client, db, probe_manual="manual" in weights)
+            if error:
+                print(f"❌ Setup failure: {error}")
+                return None
+
+            start = time.perf_counter()
+            deadline = start + args.duration
+            await asyncio.gather(*(
+                worker(client, workload, weights, deadline, args.seed + i, results)
+                for i in range(args.concurrency)
+            ))
+            elapsed = time.perf_counter() - start
+    finally:
+        if db is not None and not args.keep_load_students:
+            from generate_data import remove_load_students
+            remove_load_students(db)
+        if mongo is not None:
+            mongo.close()
+
+    return {
+        "mix": args.mix,
+        "concurrency": args.concurrency,
+        "duration_s": round(elapsed, 2),
+        "target": args.app or args.url,
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "scenarios": summarize(results, elapsed),
+    }
+
+
+def check_thresholds(report, args):
+    """Return human-readable threshold violations"""
+    failures = []
+    for scenario, stats in report["scenarios"].items():
+        if args.max_error_rate is not None and stats["error_rate"] > args.max_error_rate:
+            failures.append(f"{scenario}: error rate {stats['error_rate']:.2%} > {args.max_error_rate:.2%}")
+        if args.max_p99 is not None and stats["p99_ms"] > args.max_p99:
+            failures.append(f"{scenario}: p99 {stats['p99_ms']} ms > {args.max_p99} ms")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["scenarios"]
+        for scenario, stats in report["scenarios"].items():
+            previous = baseline.get(scenario)
+            if not previous or not previous["p95_ms"]:
+                continue
+            ratio = stats["p95_ms"] / previous["p95_ms"]
+            if ratio > args.max_regression:
+                failures.append(f"{scenario}: p95 regressed {ratio:.2f}x vs baseline "
+                                f"({previous['p95_ms']} -> {stats['p95_ms']} ms)")
+    return failures
+
+
+def print_report(report):
+    """Human-readable table of the summary"""
+    print(f"\nMix '{report['mix']}' with {report['concurrency']} clients for {report['duration_s']}s")
+    print(f"   {'scenario':<10} {'reqs':>7} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'errors':>8}")
+    for scenario, stats in report["scenarios"].items():
+        print(f"   {scenario:<10} {stats['requests']:>7} {stats['rps']:>8.1f} "
+              f"{stats['p50_ms']:>8.1f} {stats['p95_ms']:>8.1f} {stats['p99_ms']:>8.1f} "
+              f"{stats['error_rate']:>8.2%}")
+    for scenario, stats in report["scenarios"].items():
+        if stats["debounced"]:
+            print(f"   ⚠️  {stats['debounced']} {scenario} request(s) were debounced and left out "
+                  f"of the latencies; raise --load-students")
+
+
+def main():
+    """Parse options, run the load test and apply the regression gates"""
+    parser = argparse.ArgumentParser(description="Concurrent load test for the attendance API")
+    parser.add_argument("--url", default=BASE_URL, help="backend base URL")
+    parser.add_argument("--app", help="run an ASGI app in-process instead, e.g. app.main:app")
+    parser.add_argument("--app-db", default="db",
+                        help="with --app, the app's database handle to seed: an attribute of its "
+                             "module or module:attribute (default: db)")
+    parser.add_argument("--mix", choices=sorted(MIXES), default="morning", help="request mix")
+    parser.add_argument("--concurrency", type=int, default=50, help="concurrent clients")
+    parser.add_argument("--duration", type=float, default=30, help="seconds to run")
+    parser.add_argument("--class-name", default=DEFAULT_CLASS, help="class for dashboard polls")
+    parser.add_argument("--username", default="staff1", help="username query parameter")
+    parser.add_argument("--load-students", type=int, default=LOAD_STUDENTS,
+                        help="dedicated students to seed in MongoDB for taps and manual marks (0 to disable)")
+    parser.add_argument("--keep-load-students", action="store_true",
+                        help="keep the load-test students afterwards")
+    parser.add_argument("--seed", type=int, default=1, help="random seed for reproducible mixes")
+    parser.add_argument("--json", help="write the report to this file")
+    parser.add_argument("--baseline", help="previous --json report to compare p95 against")
+    parser.add_argument("--max-regression", type=float, default=1.2,
+                        help="allowed p95 ratio vs --baseline")
+    parser.add_argument("--max-p99", type=float, help="fail if any scenario p99 exceeds this (ms)")
+    parser.add_argument("--max-error-rate", type=float, help="fail if any scenario error rate exceeds this")
+    args = parser.parse_args()
+
+    print("🧪 Attendance API load test")
+    print("=" * 60)
+    report = asyncio.run(run(args))
+    if report is None:
+        return 1
+    print_report(report)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n   Report written to {args.json}")
+
+    failures = check_thresholds(report, args)
+    print("\n" + "=" * 60)
+    if failures:
+        for failure in failures:
+            print(f"❌ {failure}")
+        return 1
+    print("✅ All thresholds met")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+"""
+Multi-reader NFC acquisition daemon.
+
+One process drives any number of readers. Each reader is polled in its own
+executor thread and pushes taps into a single bounded asyncio queue. The
+queue is debounced across all readers (a card tapped on two gates within
+the debounce window counts once) and shipped upstream to /nfc/attendance
+by a few sender tasks sharing one keep-alive httpx connection pool.
+
+Reader backends are pluggable:
+    NfcpyReader       a USB/serial reader driven through nfcpy
+    SimulatedReader   random taps from a pool of UIDs at a given rate
+    ReplayReader      replays a CSV trace of "offset_seconds,nfc_uid" lines
+
+Taps are posted directly by default. A tap that still fails after a few
+retries (transport error, 5xx, or a temporary 4xx such as 401/429) goes to
+a persistent TapSpool, which a SpoolUploader drains once the backend
+recovers: the debounce has already consumed the tap, so dropping it would
+lose the student's attendance. Taps that arrive while the queue is full are
+spooled as well. After CIRCUIT_FAILURES taps in a row fail, or while the
+uploader is backing off, new taps are spooled without trying the backend
+(one probe tap per CIRCUIT_COOLDOWN goes through), so an outage does not
+tie every sender up in retries. With --spool, every accepted tap goes
+through the spool.
+
+Usage:
+    python nfc_daemon.py --reader usb --reader usb:001:004
+    python nfc_daemon.py --simulate 40 --rate 0.5 --duration 60
+    python nfc_daemon.py --replay morning_trace.csv --readers 4 --speed 10
+"""
+
+import argparse
+import asyncio
+import csv
+import os
+import random
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import httpx
+
+from debounce_store import DEBOUNCE_SECONDS, create_debounce_store
+from tap_spool import PERMANENT_REJECTIONS, SPOOL_PATH, SpoolUploader, TapSpool
+
+# Configuration
+API_BASE_URL = os.getenv("API_BASE_URL", "http://localhost:8000")
+QUEUE_SIZE = 10000
+SENDERS = 8
+TIMEOUT = 10
+STATS_INTERVAL = 10
+RETRIES = 3
+RETRY_BACKOFF = 0.5
+CIRCUIT_FAILURES = 3
+CIRCUIT_COOLDOWN = 30
+
+
+class TapReader(ABC):
+    """Base class for reader backends; read() blocks until a tap or timeout"""
+
+    def __init__(self, reader_id):
+        self.reader_id = reader_id
+
+    def open(self):
+        """Acquire the device"""
+
+    @abstractmethod
+    def read(self, timeout):
+        """Return the next tapped UID, or None if nothing was read in `timeout` seconds"""
+
+    def close(self):
+        """Release the device"""
+
+    @property
+    def exhausted(self):
+        """True once a finite source (e.g. a trace) has no more taps"""
+        return False
+
+
+class NfcpyReader(TapReader):
+    """A physical reader opened with nfc.ContactlessFrontend"""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.path = path
+        self.frontend = None
+
+    def open(self):
+        import nfc
+        self.frontend = nfc.ContactlessFrontend(self.path)
+
+    def read(self, timeout):
+        deadline = time.monotonic() + timeout
+        # on-connect returning False hands the tag back without holding the field
+        tag = self.frontend.connect(
+            rdwr={"on-connect": lambda tag: False},
+            terminate=lambda: time.monotonic() >= deadline
+        )
+        if not tag:
+            return None
+        return tag.identifier.hex().upper()
+
+    def close(self):
+        if self.frontend is not None:
+            self.frontend.close()
+
+
+class SimulatedReader(TapReader):
+    """Random taps at `rate` taps per second from a pool of UIDs"""
+
+    def __init__(self, reader_id, uids, rate, seed=None):
+        super().__init__(reader_id)
+        self.uids = uids
+        self.rate = rate
+        self.rng = random.Random(seed)
+
+    def read(self, timeout):
+        wait = self.rng.expovariate(self.rate)
+        if wait > timeout:
+            time.sleep(timeout)
+            return None
+        time.sleep(wait)
+        return self.rng.choice(self.uids)
+
+
+class ReplayReader(TapReader):
+    """Replays (offset_seconds, nfc_uid) events, optionally sped up"""
+
+    def __init__(self, reader_id, events, speed=1.0):
+        super().__init__(reader_id)
+        self.events = events
+        self.speed = speed
+        self.position = 0
+        self.started = None
+
+    def read(self, timeout):
+        if self.started is None:
+            self.started = time.monotonic()
+        if self.exhausted:
+            time.sleep(timeout)
+            return None
+        offset, uid = self.events[self.position]
+        wait = self.started + offset / self.speed - time.monotonic()
+        if wait > timeout:
+            time.sleep(timeout)
+            return None
+        if wait > 0:
+            time.sleep(wait)
+        self.position += 1
+        return uid
+
+    @property
+    def exhausted(self):
+        return self.position >= len(self.events)
+
+
+def load_trace(path, readers):
+    """Split a trace file round-robin across `readers` ReplayReader event lists"""
+    events = [[] for _ in range(readers)]
+    with open(path, newline="") as f:
+        for i, row in enumerate(r for r in csv.reader(f) if r and not r[0].startswith("#")):
+            events[i % readers].append((float(row[0]), row[1].strip().upper()))
+    return events
+
+
+class ReaderDaemon:
+    """Merges reader threads into one debounced, bounded upstream pipeline"""
+
+    def __init__(self, readers, api_base_url=API_BASE_URL, queue_size=QUEUE_SIZE,
+                 senders=SENDERS, debounce_seconds=DEBOUNCE_SECONDS, spool=None, spool_all=False,
+                 uploader=None):
+        self.readers = readers
+        self.url = f"{api_base_url}/nfc/attendance"
+        self.queue_size = queue_size
+        self.senders = senders
+        self.debounce = create_debounce_store(ttl=debounce_seconds)
+        self.spool = spool          # where undeliverable taps go (every tap with spool_all)
+        self.spool_all = spool_all
+        self.uploader = uploader    # SpoolUploader draining `spool`; its backoff opens the circuit
+        self.failure_streak = 0
+        self.probe_at = 0.0
+        self.queue = None
+        self.loop = None
+        self.stop_event = threading.Event()
+        self.counters = Counter()
+        self.per_reader = Counter()
+        self.latencies = deque(maxlen=10000)
+
+    def _enqueue(self, event):
+        """Runs on the event loop; never blocks a reader thread"""
+        if not self.debounce.check_and_set(event["nfc_uid"]):
+            self.counters["debounced"] += 1
+            return
+        try:
+            self.queue.put_nowait(event)
+            self.counters["queued"] += 1
+        except asyncio.QueueFull:
+            # The debounce has already consumed the tap, so keep it
+            if self.spool is None:
+                self.counters["dropped"] += 1
+                return
+            self.spool.append(event["nfc_uid"], event["reader_id"], event["timestamp"])
+            self.counters["spooled"] += 1
+            self.counters["overflow"] += 1
+
+    def _poll(self, reader):
+        """Reader thread: block on the device and hand taps to the loop"""
+        try:
+            reader.open()
+            while not self.stop_event.is_set() and not reader.exhausted:
+                uid = reader.read(timeout=0.5)
+                if uid is None:
+                    continue
+                self.per_reader[reader.reader_id] += 1
+                event = {"nfc_uid": uid, "reader_id": reader.reader_id,
+                         "timestamp": datetime.now().isoformat(), "read_at": time.perf_counter()}
+                self.loop.call_soon_threadsafe(self._enqueue, event)
+        except Exception as e:
+            print(f"❌ Reader {reader.reader_id} failed: {e}")
+            self.counters["reader_errors"] += 1
+        finally:
+            reader.close()
+
+    async def _post(self, client, event):
+        """
+        Post one tap, retrying with backoff; returns True once the backend
+        has answered for good (accepted, or permanently rejected).
+        """
+        for attempt in range(RETRIES + 1):
+            if attempt:
+                self.counters["retries"] += 1
+                await asyncio.sleep(RETRY_BACKOFF * 2 ** (attempt - 1))
+            try:
+                response = await client.post(self.url, json=event)
+            except httpx.HTTPError:
+                continue
+            if response.status_code < 400:
+                self.counters["sent"] += 1
+                return True
+            if response.status_code in PERMANENT_REJECTIONS:
+                self.counters["rejected"] += 1
+                return True
+        return False
+
+    def _circuit_open(self):
+        """True while taps should go straight to the spool instead of the backend"""
+        if self.spool is None:
+            return False
+        if self.uploader is not None and self.uploader.backing_off:
+            return True
+        if self.failure_streak < CIRCUIT_FAILURES:
+            return False
+        now = time.monotonic()
+        if now < self.probe_at:
+            return True
+        # Let this tap through as a probe; the others keep spooling meanwhile
+        self.probe_at = now + CIRCUIT_COOLDOWN
+        return False
+
+    async def _deliver(self, client, event):
+        """Post a tap unless the circuit is open; returns True if the backend has answered for good"""
+        if self.spool_all:
+            return False
+        if self._circuit_open():
+            self.counters["short_circuited"] += 1
+            return False
+        if await self._post(client, event):
+            self.failure_streak = 0
+            return True
+        self.failure_streak += 1
+        if self.failure_streak >= CIRCUIT_FAILURES:
+            self.probe_at = time.monotonic() + CIRCUIT_COOLDOWN
+        return False
+
+    async def _send(self, client):
+        """Sender task: ship queued taps upstream, spooling what cannot be delivered"""
+        while True:
+            event = await self.queue.get()
+            read_at = event.pop("read_at")
+            try:
+                if not await self._deliver(client, event):
+                    if self.spool is None:
+                        self.counters["failed"] += 1
+                        continue
+                    self.spool.append(event["nfc_uid"], event["reader_id"], event["timestamp"])
+                    self.counters["spooled"] += 1
+                self.latencies.append((time.perf_counter() - read_at) * 1000)
+            except Exception as e:
+                print(f"❌ Tap {event['nfc_uid']} lost: {e}")
+                self.counters["failed"] += 1
+            finally:
+                self.queue.task_done()
+
+    def stats(self):
+        """Pipeline counters and tap-to-upstream latency"""
+        latencies = sorted(self.latencies)
+        p95 = latencies[int(len(latencies) * 0.95) - 1] if latencies else 0.0
+        return {
+            **self.counters,
+            "queue_depth": self.queue.qsize() if self.queue else 0,
+            "per_reader": dict(self.per_reader),
+            "debounce": self.debounce.stats(),
+            "p95_ms": round(p95, 2)
+        }
+
+    async def _report(self, interval):
+        while True:
+            await asyncio.sleep(interval)
+            stats = self.stats()
+            print(f"   reads {sum(self.per_reader.values())}, sent {stats.get('sent', 0)}, "
+                  f"rejected {stats.get('rejected', 0)}, spooled {stats.get('spooled', 0)}, "
+                  f"debounced {stats.get('debounced', 0)}, retries {stats.get('retries', 0)}, "
+                  f"short-circuited {stats.get('short_circuited', 0)}, "
+                  f"dropped {stats.get('dropped', 0)}, failed {stats.get('failed', 0)}, "
+                  f"queue {stats['queue_depth']}, p95 {stats['p95_ms']} ms")
+
+    async def run(self, duration=None, stats_interval=STATS_INTERVAL):
+        """Run until `duration` elapses, every reader is exhausted, or Ctrl+C"""
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        executor = ThreadPoolExecutor(max_workers=len(self.readers), thread_name_prefix="reader")
+        limits = httpx.Limits(max_connections=self.senders, max_keepalive_connections=self.senders)
+
+        async with httpx.AsyncClient(limits=limits, timeout=TIMEOUT) as client:
+            pollers = [self.loop.run_in_executor(executor, self._poll, reader) for reader in self.readers]
+            tasks = [asyncio.create_task(self._send(client)) for _ in range(self.senders)]
+            tasks.append(asyncio.create_task(self._report(stats_interval)))
+            try:
+                done = asyncio.gather(*pollers)
+                await asyncio.wait_for(asyncio.shield(done), timeout=duration)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                self.stop_event.set()
+                await asyncio.gather(*pollers, return_exceptions=True)
+                await self.queue.join()
+                for task in tasks:
+                    task.cancel()
+                executor.shutdown()
+        return self.stats()
+
+
+def build_readers(args):
+    """Reader backends selected on the command line"""
+    if args.replay:
+        return [ReplayReader(f"replay-{i}", events, args.speed)
+                for i, events in enumerate(load_trace(args.replay, args.readers))]
+    if args.simulate:
+        uids = args.uids or [f"{i:08X}" for i in range(1000)]
+        return [SimulatedReader(f"sim-{i}", uids, args.rate, seed=args.seed + i)
+                for i in range(args.simulate)]
+    return [NfcpyReader(path) for path in args.reader or ["usb"]]
+
+
+def main():
+    """Start the daemon with the configured readers"""
+    parser = argparse.ArgumentParser(description="Multi-reader NFC attendance daemon")
+    parser.add_argument("--url", default=API_BASE_URL, help="backend base URL")
+    parser.add_argument("--reader", action="append", help="nfcpy device path (repeatable), e.g. usb:001:004")
+    parser.add_argument("--simulate", type=int, metavar="N", help="run N simulated readers")
+    parser.add_argument("--rate", type=float, default=0.5, help="taps per second per simulated reader")
+    parser.add_argument("--uids", nargs="+", help="UID pool for simulated readers")
+    parser.add_argument("--replay", help="CSV trace of offset_seconds,nfc_uid to replay")
+    parser.add_argument("--readers", type=int, default=1, help="readers to split a replayed trace across")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed multiplier")
+    parser.add_argument("--seed", type=int, default=1, help="random seed for simulated readers")
+    parser.add_argument("--duration", type=float, help="stop after this many seconds")
+    parser.add_argument("--senders", type=int, default=SENDERS, help="concurrent upstream requests")
+    parser.add_argument("--debounce", type=float, default=DEBOUNCE_SECONDS, help="debounce window in seconds")
+    parser.add_argument("--spool", help="send every tap through this TapSpool file instead of posting directly")
+    parser.add_argument("--fallback-spool", default=SPOOL_PATH,
+                        help="TapSpool file for taps that cannot be delivered directly")
+    args = parser.parse_args()
+
+    # The spool's uploader also delivers taps left over from an earlier run
+    spool = TapSpool(args.spool or args.fallback_spool)
+    uploader = SpoolUploader(spool, args.url)
+    uploader.start()
+
+    readers = build_readers(args)
+    daemon = ReaderDaemon(readers, args.url, senders=args.senders, debounce_seconds=args.debounce,
+                          spool=spool, spool_all=bool(args.spool), uploader=uploader)
+    print(f"📡 NFC daemon: {len(readers)} reader(s) -> {args.url}")
+    try:
+        stats = asyncio.run(daemon.run(args.duration))
+    except KeyboardInterrupt:
+        daemon.stop_event.set()
+        stats = daemon.stats()
+    finally:
+        uploader.stop(timeout=5)
+        print(f"   spool: {uploader.stats()}")
+        spool.close()
+
+    print(f"✅ Stopped: {stats}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Concurrency stress test for the manual-marking credit cap.
+
+Creates a throwaway student, fires hundreds of parallel /manual_attendance
+requests at it and then checks MongoDB directly:
+  - no more marks were accepted than the monthly credit limit allows
+  - the credits document never goes past its limit
+  - every accepted mark consumed exactly one credit
+  - exactly as many marks were accepted as the limit allows, so a run where
+    the backend rejects everything (wrong role, bad token) cannot pass
+A check-then-increment credit path fails this under enough concurrency.
+"""
+
+import argparse
+import os
+import sys
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import requests
+from pymongo import MongoClient
+
+# Configuration
+BACKEND_URL = "http://localhost:8000"
+MONGO_URL = os.getenv("MONGO_URL", "mongodb://localhost:27017/")
+MONGO_DB = os.getenv("MONGO_DB", "attendance_system")
+STRESS_ADMISSION_NO = "STRESS-CREDITS"
+CREDIT_LIMIT = 4
+TIMEOUT = 30
+
+_local = threading.local()
+
+
+def get_session(token):
+    """One keep-alive session per worker thread"""
+    if not hasattr(_local, "session"):
+        _local.session = requests.Session()
+        if token:
+            _local.session.headers["Authorization"] = f"Bearer {token}"
+    return _local.session
+
+
+def setup_student(db):
+    """Create the stress student with no credits used this month"""
+    cleanup(db)
+    db["students"].insert_one({
+        "admission_no": STRESS_ADMISSION_NO,
+        "name": "Credit Stress Student",
+        "student_id": STRESS_ADMISSION_NO,
+        "class_name": "STRESS",
+        "section": "A",
+        "created_at": datetime.utcnow()
+    })
+
+
+def cleanup(db):
+    """Remove everything the stress run created"""
+    db["students"].delete_many({"admission_no": STRESS_ADMISSION_NO})
+    db["attendance"].delete_many({"admission_no": STRESS_ADMISSION_NO})
+    db["credits"].delete_many({"admission_no": STRESS_ADMISSION_NO})
+
+
+def mark_slot(index, today):
+    """(day, session) of the index-th mark: distinct days up to today, both sessions"""
+    return index // 2 % today.day + 1, "morning" if index % 2 == 0 else "evening"
+
+
+def mark(args, index):
+    """Send one manual mark; returns (HTTP status code or 0 on error, response body)"""
+    now = datetime.now()
+    # Spread marks over distinct past days and sessions of the current month,
+    # since future dates may be refused for reasons unrelated to credits
+    day, session = mark_slot(index, now)
+    payload = {
+        "admission_no": STRESS_ADMISSION_NO,
+        "date": f"{now.year}-{now.month:02d}-{day:02d}",
+        "session": session,
+        "status": "Present"
+    }
+    try:
+        response = get_session(args.token).post(
+            f"{args.url}/manual_attendance",
+            params={"username": args.username},
+            json=payload,
+            timeout=TIMEOUT
+        )
+        return response.status_code, response.text[:200]
+    except requests.RequestException as e:
+        return 0, str(e)
+
+
+def main():
+    """Run the stress test and verify the credit invariants"""
+    parser = argparse.ArgumentParser(description="Stress the manual attendance credit cap")
+    parser.add_argument("--url", default=BACKEND_URL, help="backend base URL")
+    parser.add_argument("--requests", type=int, default=400, help="total manual marks to send")
+    parser.add_argument("--concurrency", type=int, default=64, help="parallel workers")
+    parser.add_argument("--username", default="staff1", help="staff username")
+    parser.add_argument("--token", help="bearer token sent with every request")
+    parser.add_argument("--limit", type=int, default=CREDIT_LIMIT, help="monthly credit limit")
+    parser.add_argument("--keep", action="store_true", help="keep the stress student afterwards")
+    args = parser.parse_args()
+
+    client = MongoClient(MONGO_URL)
+    db = client[MONGO_DB]
+    now = datetime.now()
+
+    print("🧪 Manual attendance credit stress test")
+    print("=" * 50)
+    try:
+        setup_student(db)
+        # One mark on its own first: if it is refused, the setup is wrong and
+        # the storm would only measure rejections
+        probe_status, probe_body = mark(args, 0)
+        if probe_status != 200:
+            print(f"❌ Setup failure: first mark returned HTTP {probe_status}: {probe_body}")
+            print(f"   Check that {args.username} may mark class STRESS and that --token is valid")
+            return 1
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            statuses = Counter(status for status, _ in pool.map(lambda i: mark(args, i),
+                                                                range(1, args.requests)))
+        statuses[200] += 1
+
+        credit = db["credits"].find_one({
+            "admission_no": STRESS_ADMISSION_NO, "year": now.year, "month": now.month
+        }) or {"used": 0, "limit": args.limit}
+    finally:
+        if not args.keep:
+            cleanup(db)
+        client.close()
+
+    accepted = statuses.get(200, 0)
+    distinct_marks = len({mark_slot(i, now) for i in range(args.requests)})
+    expected = min(args.limit, distinct_marks)
+    print(f"   Requests sent: {args.requests} ({args.concurrency} in parallel)")
+    print(f"   Responses: {dict(sorted(statuses.items()))}")
+    print(f"   Credits document: {credit['used']}/{credit['limit']} used")
+
+    failures = []
+    if statuses.get(0):
+        failures.append(f"{statuses[0]} request(s) failed to connect")
+    if accepted > args.limit:
+        failures.append(f"{accepted} marks accepted with a limit of {args.limit}")
+    elif accepted < expected:
+        rejected = {code: count for code, count in statuses.items() if code != 200}
+        failures.append(f"setup failure: only {accepted} of {expected} marks accepted, "
+                        f"other responses {rejected}")
+    if credit["used"] > credit["limit"]:
+        failures.append(f"credits overspent: {credit['used']}/{credit['limit']}")
+    if credit["used"] != accepted:
+        failures.append(f"{accepted} marks accepted but {credit['used']} credits consumed")
+
+    print("\n" + "=" * 50)
+    if failures:
+        for failure in failures:
+            print(f"❌ {failure}")
+        return 1
+    print("✅ Credit cap held under concurrency")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
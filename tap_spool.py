@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Persistent offline spool for NFC taps.
+
+The reader loop calls TapSpool.append(), which is a single SQLite insert in
+WAL mode and never touches the network. A SpoolUploader thread drains the
+spool to the backend's /nfc/attendance endpoint over one keep-alive
+session, backing off while the backend is slow, down or refusing the
+reader's requests. Taps survive restarts of both the reader and the
+backend.
+
+Only the SQLite side is batched: up to BATCH_SIZE taps are read and
+acked per round trip to the database, but /nfc/attendance takes one tap
+per request, so each tap is still its own POST.
+
+Usage:
+    python tap_spool.py --status           # show spool depth
+    python tap_spool.py --drain            # upload everything and exit
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+import requests
+
+# Configuration
+API_BASE_URL = os.getenv("API_BASE_URL", "http://localhost:8000")
+SPOOL_PATH = os.getenv("NFC_SPOOL_PATH", "nfc_spool.db")
+BATCH_SIZE = 100
+POLL_INTERVAL = 0.5
+MAX_BACKOFF = 60.0
+TIMEOUT = 10
+RATE_WINDOW = 60
+# 4xx responses meaning the backend will never accept the tap: malformed,
+# unknown card, conflict, or failed validation. Anything else (401/403 auth
+# problems, 408, 429 rate limiting) is treated as temporary.
+PERMANENT_REJECTIONS = {400, 404, 409, 410, 422}
+
+
+class TapSpool:
+    """Append-only, crash-safe queue of taps backed by SQLite in WAL mode"""
+
+    def __init__(self, path=SPOOL_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # NORMAL keeps commits durable across process crashes without an fsync per tap
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS taps ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " nfc_uid TEXT NOT NULL,"
+            " timestamp TEXT NOT NULL,"
+            " reader_id TEXT)"
+        )
+
+    def append(self, nfc_uid, reader_id=None, timestamp=None):
+        """Record a tap; returns as soon as it is on disk"""
+        timestamp = timestamp or datetime.now().isoformat()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO taps (nfc_uid, timestamp, reader_id) VALUES (?, ?, ?)",
+                (nfc_uid, timestamp, reader_id),
+            )
+
+    def peek(self, limit=BATCH_SIZE):
+        """Return the oldest `limit` taps as dicts, without removing them"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, nfc_uid, timestamp, reader_id FROM taps ORDER BY id LIMIT ?",
+                (limit,),
+            ).fetchall()
+        return [
+            {"id": row[0], "nfc_uid": row[1], "timestamp": row[2], "reader_id": row[3]}
+            for row in rows
+        ]
+
+    def ack(self, tap_ids):
+        """Remove taps that have been delivered (or permanently rejected)"""
+        if not tap_ids:
+            return
+        with self._lock:
+            self._conn.executemany("DELETE FROM taps WHERE id = ?", [(i,) for i in tap_ids])
+
+    def depth(self):
+        """Number of taps waiting to be uploaded"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM taps").fetchone()[0]
+
+    def close(self):
+        """Close the underlying database"""
+        with self._lock:
+            self._conn.close()
+
+
+class SpoolUploader(threading.Thread):
+    """
+    Background thread that drains a TapSpool to the backend.
+
+    Taps are posted oldest first, one request each. A 2xx response acks
+    the tap, and so does a permanent rejection (PERMANENT_REJECTIONS, e.g.
+    an unregistered card); a debounced duplicate comes back as a 2xx.
+    Connection errors, 5xx and any other 4xx (expired credentials, rate
+    limiting) keep the tap, stop the batch and back off exponentially up to
+    MAX_BACKOFF seconds.
+    """
+
+    def __init__(self, spool, api_base_url=API_BASE_URL, batch_size=BATCH_SIZE,
+                 poll_interval=POLL_INTERVAL, session=None):
+        super().__init__(name="spool-uploader", daemon=True)
+        self.spool = spool
+        self.url = f"{api_base_url}/nfc/attendance"
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.session = session or requests.Session()
+        self._stop_event = threading.Event()
+        self._backoff = 0.0
+        self._delivered = deque()  # [monotonic second, taps delivered in it]
+        self.uploaded = 0
+        self.rejected = 0
+        self.failures = 0
+        self.last_error = None
+
+    def run(self):
+        while not self._stop_event.is_set():
+            sent = self.drain_once()
+            if self._backoff:
+                self._stop_event.wait(self._backoff)
+            elif not sent:
+                self._stop_event.wait(self.poll_interval)
+
+    def stop(self, timeout=None):
+        """Ask the thread to exit and wait for it"""
+        self._stop_event.set()
+        self.join(timeout)
+
+    def drain_once(self):
+        """Upload one batch; returns the number of taps acked"""
+        batch = self.spool.peek(self.batch_size)
+        acked = []
+        for tap in batch:
+            if not self._deliver(tap):
+                break
+            acked.append(tap["id"])
+        self.spool.ack(acked)
+        return len(acked)
+
+    def _deliver(self, tap):
+        """Post a single tap; returns True if it can be removed from the spool"""
+        payload = {"nfc_uid": tap["nfc_uid"], "timestamp": tap["timestamp"]}
+        if tap["reader_id"]:
+            payload["reader_id"] = tap["reader_id"]
+
+        try:
+            response = self.session.post(self.url, json=payload, timeout=TIMEOUT)
+        except requests.RequestException as e:
+            return self._failed(str(e))
+        if response.status_code >= 400 and response.status_code not in PERMANENT_REJECTIONS:
+            return self._failed(f"HTTP {response.status_code}")
+
+        if response.status_code < 400:
+            self.uploaded += 1
+        else:
+            self.rejected += 1
+        self._count_delivery()
+        self._backoff = 0.0
+        return True
+
+    def _count_delivery(self):
+        """Per-second delivery counts, kept only for the last RATE_WINDOW seconds"""
+        now = int(time.monotonic())
+        if self._delivered and self._delivered[-1][0] == now:
+            self._delivered[-1][1] += 1
+        else:
+            self._delivered.append([now, 1])
+        while self._delivered[0][0] <= now - RATE_WINDOW:
+            self._delivered.popleft()
+
+    def _failed(self, error):
+        self.failures += 1
+        self.last_error = error
+        self._backoff = min(MAX_BACKOFF, max(1.0, self._backoff * 2))
+        return False
+
+    @property
+    def backing_off(self):
+        """True from a failed delivery until the next successful one"""
+        return self._backoff > 0
+
+    def drain_rate(self, window=RATE_WINDOW):
+        """Taps delivered per second over the last `window` (<= RATE_WINDOW) seconds"""
+        cutoff = time.monotonic() - window
+        return sum(count for second, count in list(self._delivered) if second >= cutoff) / window
+
+    def stats(self):
+        """Spool and uploader metrics"""
+        return {
+            "spool_depth": self.spool.depth(),
+            "drain_rate_per_sec": round(self.drain_rate(), 2),
+            "uploaded": self.uploaded,
+            "rejected": self.rejected,
+            "failures": self.failures,
+            "backoff_sec": self._backoff,
+            "last_error": self.last_error,
+        }
+
+
+def main():
+    """Inspect or manually drain a spool file"""
+    parser = argparse.ArgumentParser(description="Inspect or drain the NFC tap spool")
+    parser.add_argument("--spool", default=SPOOL_PATH, help="spool database path")
+    parser.add_argument("--url", default=API_BASE_URL, help="backend base URL")
+    parser.add_argument("--status", action="store_true", help="print spool depth and exit")
+    parser.add_argument("--drain", action="store_true", help="upload all spooled taps and exit")
+    args = parser.parse_args()
+
+    spool = TapSpool(args.spool)
+    try:
+        if args.drain:
+            uploader = SpoolUploader(spool, args.url)
+            while spool.depth():
+                if not uploader.drain_once():
+                    print(f"❌ Upload stalled: {uploader.last_error}")
+                    return 1
+            print(f"✅ Spool drained: {uploader.uploaded} uploaded, {uploader.rejected} rejected")
+        else:
+            print(f"Spool {args.spool}: {spool.depth()} tap(s) pending")
+    finally:
+        spool.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())